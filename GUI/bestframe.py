@@ -0,0 +1,130 @@
+import heapq
+import cv2
+
+
+class Candidate():
+    """A scored crop of one frame of a pass.
+
+    `offset` is the (x, y) of the crop's top-left corner in the frame, so
+    coordinates found in the crop can be moved back to the frame. Equal
+    scores rank the more centred frame first, then the older one.
+    """
+    def __init__(self, score, seq, crop, plane, offset, distance=0.0):
+        self.score = score
+        self.seq = seq
+        self.crop = crop
+        self.plane = plane
+        self.offset = offset
+        self.distance = distance
+
+    @property
+    def rank(self):
+        return _rank(self.score, self.distance, self.seq)
+
+    def __lt__(self, other):
+        return self.rank < other.rank
+
+
+def _rank(score, distance, seq):
+    return (score, -distance, -seq)
+
+
+class BestFrameSelector():
+    """Online choice of the best frames of a figure pass.
+
+    Every frame is scored when it arrives, from the figure's main contour:
+
+    * completeness: 1 if the contour stays clear of the frame border, else
+      `clipped_weight`, so a piece that touches the border on every frame is
+      still ranked by its centering and sharpness
+    * centering: 1 at the frame center, 0 at the border
+    * sharpness: Laplacian variance of the figure, as s / (s + sharpness_ref)
+
+    Only the `k` best crops (the contour's bounding box grown by `margin`)
+    are kept, so a pass costs O(k) memory whatever its length. ``offer()``
+    returns True once per pass, on the first frame after the figure went
+    through the center, so callers can classify without waiting for the
+    figure to leave.
+    """
+    def __init__(self, k=3, margin=0, sharpness_ref=100.0, fire_radius=0.15, clipped_weight=0.5):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.margin = margin
+        self.sharpness_ref = sharpness_ref
+        self.fire_radius = fire_radius
+        self.clipped_weight = clipped_weight
+        self.reset()
+
+    def reset(self):
+        self._heap = []
+        self._last_distance = None
+        self.fired = False
+        self.offered = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def score(self, frame_shape, contour, gray_crop=None):
+        height, width = frame_shape[:2]
+        x, y, w, h = cv2.boundingRect(contour)
+        clipped = x <= 0 or y <= 0 or x + w >= width or y + h >= height
+        complete = self.clipped_weight if clipped else 1.0
+
+        moments = cv2.moments(contour)
+        if moments['m00']:
+            cx, cy = moments['m10'] / moments['m00'], moments['m01'] / moments['m00']
+        else:
+            cx, cy = x + w / 2.0, y + h / 2.0
+        distance = max(abs(cx - width / 2.0) / (width / 2.0), abs(cy - height / 2.0) / (height / 2.0))
+        centered = max(0.0, 1.0 - distance)
+
+        sharp = 1.0
+        if gray_crop is not None and gray_crop.size:
+            _, std = cv2.meanStdDev(cv2.Laplacian(gray_crop, cv2.CV_32F))
+            variance = float(std[0, 0]) ** 2
+            sharp = variance / (variance + self.sharpness_ref)
+        return complete * centered * sharp, distance
+
+    def offer(self, frame, contour, plane=None, seq=None):
+        """Score one frame of the pass and keep its crop if it is in the top k"""
+        seq = self.offered if seq is None else seq
+        self.offered += 1
+        height, width = frame.shape[:2]
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = max(0, x - self.margin), max(0, y - self.margin)
+        x1, y1 = min(width, x + w + self.margin), min(height, y + h + self.margin)
+
+        if plane is None:
+            gray = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        else:
+            gray = plane[y:y + h, x:x + w]
+        score, distance = self.score(frame.shape, contour, gray)
+
+        if len(self._heap) < self.k or _rank(score, distance, seq) > self._heap[0].rank:
+            candidate = Candidate(
+                score, seq,
+                frame[y0:y1, x0:x1].copy(),
+                None if plane is None else plane[y0:y1, x0:x1].copy(),
+                (x0, y0),
+                distance,
+            )
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, candidate)
+            else:
+                heapq.heapreplace(self._heap, candidate)
+
+        # Fire once the figure starts moving away from the center
+        fire = (not self.fired and self._last_distance is not None
+                and self._last_distance <= self.fire_radius and distance > self._last_distance)
+        self._last_distance = distance
+        if fire:
+            self.fired = True
+        return fire
+
+    def best(self):
+        return max(self._heap) if self._heap else None
+
+    def candidates(self):
+        """Kept candidates, best first"""
+        return sorted(self._heap, reverse=True)
@@ -1,45 +1,358 @@
+import queue
 import threading
-import cv2
 import time
 from logger import Logger
- 
- 
- 
+from sources import open_source
+
+
+
+class FrameSlot():
+    """Latest-frame handoff between a capture thread and its consumers.
+
+    Every published frame gets a sequence number; consumers remember the last
+    one they used and ask only for something newer.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._ret = None
+        self._frame = None
+        self._closed = False
+
+    def publish(self, ret, frame):
+        with self._cond:
+            self._ret = ret
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+        return self._seq
+
+    def latest(self):
+        """Return (seq, ret, frame) as one consistent snapshot"""
+        with self._cond:
+            return self._seq, self._ret, self._frame
+
+    def wait_newer(self, seq, timeout=None):
+        """Block until a frame newer than `seq` exists and return the newest one.
+
+        Returns None on timeout or when the slot is closed. `timeout=0` turns
+        this into a non-blocking poll for the Tk loop.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout):
+                return None
+            if self._seq <= seq:
+                return None
+            return self._seq, self._ret, self._frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def seq(self):
+        with self._cond:
+            return self._seq
+
+
+class CameraStats():
+    """Health numbers of one camera, written by its own threads.
+
+    `fps`, `decode_ms` and `analysis_ms` are exponential moving averages;
+    `dropped` counts frames the analysis pipeline never saw because a newer
+    frame replaced them first.
+    """
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self.frames = 0
+        self.failures = 0
+        self.reconnects = 0
+        self.dropped = 0
+        self.analyzed = 0
+        self.fps = 0.0
+        self.decode_ms = 0.0
+        self.analysis_ms = 0.0
+        self._last_frame_at = None
+
+    def _average(self, current, value):
+        return value if current == 0.0 else current + self.smoothing * (value - current)
+
+    def frame_read(self, seconds):
+        now = time.monotonic()
+        if self._last_frame_at is not None and now > self._last_frame_at:
+            self.fps = self._average(self.fps, 1.0 / (now - self._last_frame_at))
+        self._last_frame_at = now
+        self.decode_ms = self._average(self.decode_ms, seconds * 1000.0)
+        self.frames += 1
+
+    def frame_analyzed(self, seconds, skipped):
+        self.analysis_ms = self._average(self.analysis_ms, seconds * 1000.0)
+        self.dropped += skipped
+        self.analyzed += 1
+
+    def snapshot(self):
+        return {
+            'frames': self.frames,
+            'fps': self.fps,
+            'decode_ms': self.decode_ms,
+            'failures': self.failures,
+            'reconnects': self.reconnects,
+            'analyzed': self.analyzed,
+            'analysis_ms': self.analysis_ms,
+            'dropped': self.dropped,
+        }
+
+
 class RunCamera():
-    def __init__(self, src=0, name="Camera_1"):
+    """One camera read on its own thread, with reconnection and stats.
+
+    After `max_failures` failed reads in a row the source is closed and
+    reopened, waiting `retry_delay` seconds at first and twice as long after
+    each failed attempt, up to `max_backoff`. With a `pipeline` (a callable
+    taking a frame) a second thread runs it on the newest frame; non-None
+    results go to `results` as (name, seq, result).
+
+    ``restart()`` never starts a second capture thread next to one that is
+    still stuck in a read: it counts a failure and starts again once the old
+    thread has exited, checking with the same backoff.
+    """
+    def __init__(self, src=0, name="Camera_1", retry_delay=0.5, max_backoff=8.0,
+                 max_failures=5, warmup=1.0, pipeline=None, results=None):
         try:
             self.name = name
             self.src = src
-            self.ret = None
-            self.frame = None
-            self.stopped = False
+            self.retry_delay = retry_delay
+            self.max_backoff = max_backoff
+            self.max_failures = max_failures
+            self.warmup = warmup
+            self.pipeline = pipeline
+            self.results = queue.SimpleQueue() if results is None else results
+            self.slot = FrameSlot()
+            self.stats = CameraStats()
+            self.stop_event = threading.Event()
+            self.stream = None
+            self.my_thread = None
+            self.analysis_thread = None
+            self._restart_pending = False
+            self._restart_thread = None
             self.loggerReport = Logger('LoggerCamera')
             self.loggerReport.logger.info(f"[INFO] Initializing constructor RunCamera ...")
         except Exception as e:
             self.loggerReport.logger.error(f"[ERROR] Error in constructor RunCamera: {e}")
-           
- 
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    @property
+    def running(self):
+        return self.my_thread is not None and self.my_thread.is_alive()
+
+    @property
+    def ret(self):
+        return self.slot.latest()[1]
+
+    @property
+    def frame(self):
+        return self.slot.latest()[2]
+
+
     def start(self):
+        """Start the camera threads; opening the source happens on them, so this never blocks"""
         try:
-            self.stream = cv2.VideoCapture(self.src)
-            time.sleep(1)
-            self.ret, self.frame = self.stream.read()
-            if self.stream.isOpened():
-                self.my_thread = threading.Thread(target=self.get, name=self.name, daemon=True)
-                self.my_thread.start()
-                self.loggerReport.logger.info(f"[INFO] Camera {self.name} started ...")
-            else:
-                self.loggerReport.logger.error(f"[ERROR] Camera {self.name} not opened ...")
- 
+            if self.running:
+                self.loggerReport.logger.warning(f"[WARNING] Camera {self.name} is already running ...")
+                return
+            self.stop_event.clear()
+            self.slot = FrameSlot()
+            self.my_thread = threading.Thread(target=self.get, name=self.name, daemon=True)
+            self.my_thread.start()
+            if self.pipeline is not None:
+                self.analysis_thread = threading.Thread(target=self.analyze, name=f"{self.name}_analysis", daemon=True)
+                self.analysis_thread.start()
+            self.loggerReport.logger.info(f"[INFO] Camera {self.name} started ...")
         except Exception as e:
             self.loggerReport.error(f"[ERROR] Error in start camera: {e}")
- 
+
+    def stop(self):
+        self._restart_pending = False
+        self.stop_event.set()
+        self.slot.close()
+        for thread in (self.my_thread, self.analysis_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=2)
+        # Pipelines that own resources (e.g. transport.ProcessPipeline) shut down here
+        close = getattr(self.pipeline, 'close', None)
+        if close is not None:
+            result = close()
+            if result:
+                self.results.put((self.name, None, result))
+        self.loggerReport.logger.info(f"[INFO] Camera {self.name} stopped ...")
+
+    def restart(self):
+        """Stop and start again; returns False if the restart had to be
+        deferred because the capture thread did not exit in time"""
+        self.stop()
+        if not self.running:
+            self.start()
+            return True
+        self.stats.failures += 1
+        self.loggerReport.logger.error(f"[ERROR] Camera {self.name} capture thread did not stop, restarting once it exits ...")
+        self._restart_pending = True
+        if self._restart_thread is None or not self._restart_thread.is_alive():
+            self._restart_thread = threading.Thread(target=self._restart_when_stopped, args=(self.my_thread,),
+                                                    name=f"{self.name}_restart", daemon=True)
+            self._restart_thread.start()
+        return False
+
+    def _restart_when_stopped(self, thread):
+        backoff = self.retry_delay
+        while True:
+            thread.join(timeout=backoff)
+            if not thread.is_alive():
+                break
+            if not self._restart_pending:
+                return
+            self.stats.failures += 1
+            self.loggerReport.logger.warning(f"[WARNING] Camera {self.name} capture thread still busy, retrying in {backoff:.1f} s ...")
+            backoff = min(backoff * 2, self.max_backoff)
+        # A stop() in the meantime cancels the restart
+        if self._restart_pending:
+            self._restart_pending = False
+            self.start()
+
+    def _open(self):
+        try:
+            self.stream = open_source(self.src)
+            if self.stream.isOpened():
+                return True
+            self.stream.release()
+        except Exception as e:
+            self.loggerReport.logger.error(f"[ERROR] Error opening camera {self.name}: {e}")
+        self.stream = None
+        return False
+
+    def _close(self):
+        if self.stream is not None:
+            self.stream.release()
+            self.stream = None
+
     def get(self):
-        while not self.stopped:
-            if not self.ret:
-                pass
-            else:
+        backoff = self.retry_delay
+        failures = 0
+        opened_before = False
+        try:
+            while not self.stop_event.is_set():
+                if self.stream is None:
+                    if not self._open():
+                        self.stats.failures += 1
+                        self.loggerReport.logger.error(f"[ERROR] Camera {self.name} not opened, retrying in {backoff:.1f} s ...")
+                        # Sleep instead of spinning on a dead camera; stop() wakes us up
+                        self.stop_event.wait(backoff)
+                        backoff = min(backoff * 2, self.max_backoff)
+                        continue
+                    if opened_before:
+                        self.stats.reconnects += 1
+                        self.loggerReport.logger.info(f"[INFO] Camera {self.name} reconnected ...")
+                    opened_before = True
+                    backoff = self.retry_delay
+                    failures = 0
+                    self.stop_event.wait(self.warmup)
+                    continue
+
+                started = time.perf_counter()
                 try:
-                    self.ret, self.frame = self.stream.read()
+                    ret, frame = self.stream.read()
                 except Exception as e:
-                    self.loggerReport.logger.error(f"[ERROR] Error in get frame: {e}")
\ No newline at end of file
+                    self.loggerReport.logger.error(f"[ERROR] Error in get frame: {e}")
+                    ret, frame = False, None
+                if ret:
+                    self.stats.frame_read(time.perf_counter() - started)
+                    failures = 0
+                    seq = self.slot.publish(ret, frame)
+                    self.loggerReport.debug_limited('frame', f"[DEBUG] Camera {self.name} frame {seq}", interval=5.0)
+                    continue
+
+                self.stats.failures += 1
+                failures += 1
+                if failures >= self.max_failures:
+                    self.loggerReport.logger.warning(f"[WARNING] Camera {self.name} lost after {failures} failed reads, reconnecting ...")
+                    self._close()
+                else:
+                    self.stop_event.wait(self.retry_delay)
+        finally:
+            self._close()
+
+    def analyze(self):
+        """Run the pipeline on the newest frame; frames that arrive meanwhile are skipped"""
+        seq = 0
+        while not self.stop_event.is_set():
+            snapshot = self.slot.wait_newer(seq, timeout=0.5)
+            if snapshot is None:
+                continue
+            new_seq, ret, frame = snapshot
+            skipped = new_seq - seq - 1 if seq else 0
+            seq = new_seq
+            if not ret:
+                continue
+            started = time.perf_counter()
+            try:
+                result = self.pipeline(frame)
+            except Exception as e:
+                self.loggerReport.logger.error(f"[ERROR] Error in {self.name} pipeline: {e}")
+                result = None
+            self.stats.frame_analyzed(time.perf_counter() - started, skipped)
+            if result is not None:
+                self.results.put((self.name, seq, result))
+
+
+class CameraSupervisor():
+    """Starts, stops and restarts several RunCamera workers by name.
+
+    Every camera has its own capture and analysis threads, so a slow or
+    dead camera only delays itself. Pipeline results of all cameras arrive
+    on the shared `results` queue.
+    """
+    def __init__(self):
+        self.cameras = {}
+        self.results = queue.SimpleQueue()
+
+    def add(self, src, name=None, pipeline=None, **options):
+        name = name or f"Camera_{len(self.cameras) + 1}"
+        if name in self.cameras:
+            raise ValueError(f"Camera {name} already exists")
+        self.cameras[name] = RunCamera(src=src, name=name, pipeline=pipeline,
+                                       results=self.results, **options)
+        return self.cameras[name]
+
+    def remove(self, name):
+        self.cameras.pop(name).stop()
+
+    def _select(self, name):
+        return list(self.cameras.values()) if name is None else [self.cameras[name]]
+
+    def start(self, name=None):
+        for cam in self._select(name):
+            cam.start()
+
+    def stop(self, name=None):
+        cams = self._select(name)
+        # Signal everyone first so the joins overlap instead of adding up
+        for cam in cams:
+            cam.stop_event.set()
+        for cam in cams:
+            cam.stop()
+
+    def restart(self, name=None):
+        cams = self._select(name)
+        for cam in cams:
+            cam.stop_event.set()
+        for cam in cams:
+            cam.restart()
+
+    def stats(self):
+        return {name: cam.stats.snapshot() for name, cam in self.cameras.items()}
+
+    def __getitem__(self, name):
+        return self.cameras[name]
@@ -0,0 +1,377 @@
+"""Display-free circle/ring counter.
+
+Usage (from the GUI directory, or with GUI on PYTHONPATH):
+
+    python -m counter count ../contornos/camara/video_1_12.avi
+    python -m counter count synthetic:1920x1080@120/3600
+    python -m counter count ../contornos/camara/video_1_12.avi --journal logs/events.evj
+    python -m counter count ../contornos/camara/video_1_12.avi --tracker
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import figures
+from journal import EventJournal
+from tracker import FigureTracker
+from framebuffer import DROP_OLDEST, DECIMATE
+from presence import PresenceDetector
+from sources import open_source
+
+
+# Decimation of the presence check; None checks presence at full resolution
+PRESENCE_SCALE = 4
+
+
+class FigureCounter():
+    """Frame-by-frame Simple/Double counter with the video.py logic and no UI.
+
+    Feed frames in order to ``process()``; it returns an event dict when a
+    figure leaves the scene and was classified, otherwise None.
+    """
+    def __init__(self, buffer_capacity=64, buffer_policy=DROP_OLDEST,
+                 start_index=0, keep_detection=False, presence_scale=PRESENCE_SCALE):
+        self.frames_buffer = figures.FigureBuffer(capacity=buffer_capacity, policy=buffer_policy)
+        # Presence is decided on a decimated frame; full-resolution masks are
+        # only computed for the buffered frames classify_pass looks at
+        self.presence = PresenceDetector(presence_scale) if presence_scale else None
+        self.keep_detection = keep_detection
+        self.frame_index = start_index
+        self.total_figures = 0
+        self.circles = 0
+        self.rings = 0
+        self.figure_present = False
+        self.start_frame = 0
+        self.pass_start_index = 0
+        self._binary = None
+
+    @property
+    def totals(self):
+        return {
+            'total': self.total_figures,
+            figures.SIMPLE: self.circles,
+            figures.DOUBLE: self.rings,
+        }
+
+    def detect(self, frame, binary=None):
+        """(has_figure, binary) for `frame`.
+
+        `binary` is None when the decimated check was enough; the buffer then
+        fills it in only for the frames classify_pass looks at.
+        """
+        if binary is None and self.presence is not None:
+            if self.presence(frame):
+                return True, None
+            if not self.figure_present:
+                return False, None
+            # Confirm exits at full resolution: a sliver under the sampling
+            # grid would otherwise split the pass in two
+        if binary is None:
+            binary = self._binary = figures.binarize(frame, dst=self._binary)
+        return figures.has_figure(binary), binary
+
+    def process(self, frame, binary=None):
+        has_figure, binary = self.detect(frame, binary)
+        event = None
+
+        # Idle frames have no contours, so only the current pass is buffered
+        if has_figure and not self.figure_present:
+            self.figure_present = True
+            self.frames_buffer.clear()
+            self.start_frame = self.frames_buffer.next_seq
+            self.pass_start_index = self.frame_index
+
+        elif not has_figure and self.figure_present:
+            self.figure_present = False
+            end_frame = len(self.frames_buffer)
+            mid_frame_idx = (self.frames_buffer.position(self.start_frame) + end_frame) // 2
+
+            if mid_frame_idx < len(self.frames_buffer):
+                event = self._classify(mid_frame_idx, end_frame)
+
+            self.frames_buffer.clear()
+
+        if self.figure_present:
+            self.frames_buffer.append(frame, binary)
+
+        self.frame_index += 1
+        return event
+
+    def _classify(self, mid_frame_idx, end_frame):
+        result = figures.classify_pass(self.frames_buffer, mid_frame_idx, end_frame)
+        if result is None:
+            return None
+        label, frame_idx, fallback = result
+        self.total_figures += 1
+        if label == figures.SIMPLE:
+            self.circles += 1
+            number = self.circles
+        else:
+            self.rings += 1
+            number = self.rings
+
+        # Centroid and area of the white pixels of the deciding frame
+        moments = cv2.moments(self.frames_buffer.binary(frame_idx), binaryImage=True)
+        area = moments['m00']
+        centroid = (moments['m10'] / area, moments['m01'] / area) if area else None
+
+        event = {
+            'frame': self.pass_start_index + self.frames_buffer.seq_at(frame_idx),
+            'exit_frame': self.frame_index,
+            'label': label,
+            'number': number,
+            'internal_contours': self.frames_buffer.internal_contours(frame_idx),
+            'fallback': fallback,
+            'centroid': centroid,
+            'area': area,
+        }
+        if self.keep_detection:
+            event['binary'] = self.frames_buffer.binary(frame_idx).copy()
+        return event
+
+
+def events_of(result):
+    """Events from a process() result: FigureCounter returns one event or
+    None, FigureTracker a list"""
+    if result is None:
+        return []
+    if isinstance(result, dict):
+        return [result]
+    return result
+
+
+def counter_pipeline(**counter_options):
+    """Per-frame FigureCounter callable for transport's analysis processes"""
+    return FigureCounter(**counter_options).process
+
+
+def count_video(path, max_frames=None, tracking=False, **counter_options):
+    """Run FigureCounter over a whole video as fast as frames decode.
+
+    `path` is anything open_source() accepts. With `tracking=True` the
+    multi-object FigureTracker counts instead. Returns a dict with the
+    totals, the per-figure events, the number of frames read and the
+    processing rate.
+    """
+    cap = open_source(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {path}")
+
+    counter = FigureTracker(**counter_options) if tracking else FigureCounter(**counter_options)
+    events = []
+    frame = None
+    start = time.perf_counter()
+    try:
+        while True:
+            # Decode into the previous frame's memory instead of a new array
+            if max_frames is not None and counter.frame_index >= max_frames:
+                break
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            for event in events_of(counter.process(frame)):
+                event['timestamp'] = cap.timestamp
+                events.append(event)
+    finally:
+        cap.release()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'video': str(path),
+        'totals': counter.totals,
+        'events': events,
+        'frames': counter.frame_index,
+        'seconds': elapsed,
+        'fps': counter.frame_index / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _count_shard(path, start, stop, warmup, counter_options):
+    """Count one shard of a video in a worker process.
+
+    A shard runs from the first figure exit at or after `start` to the first
+    figure exit at or after `stop`, both included. Exits are found on the
+    full-resolution mask, whatever presence check the counter uses: a frame
+    with an empty mask leaves every counter idle with an empty buffer, so a
+    fresh counter started there is in exactly the same state. The next shard starts at the
+    same frame, so every figure is counted by exactly one shard. Shard 0
+    starts at frame 0 like the sequential run. A shard with no exit before
+    `stop` counts nothing: its first exit is the next shard's start.
+    """
+    cap = open_source(path)
+    index = max(0, start - warmup - 1)
+    if index > 0:
+        cap.seek(index)
+
+    events = []
+    frame = None
+    binary = None
+    counter = None
+    prev_present = False
+    try:
+        # Phase 1: skip to the first figure exit at or after `start`
+        while counter is None:
+            if stop is not None and index >= stop:
+                break
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            if start == 0:
+                counter = FigureCounter(start_index=index, **counter_options)
+                counter.process(frame)
+                break
+            if index >= start - 1:
+                binary = figures.binarize(frame, dst=binary)
+                present = figures.has_figure(binary)
+                if index >= start and prev_present and not present:
+                    counter = FigureCounter(start_index=index, **counter_options)
+                    counter.process(frame, binary)
+                    # Phase 2 continues from this empty frame
+                    prev_present = False
+                    break
+                prev_present = present
+            index += 1
+
+        # Phase 2: count until the first figure exit at or after `stop`
+        while counter is not None:
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            event = counter.process(frame)
+            if event is not None:
+                event['timestamp'] = cap.timestamp
+                events.append(event)
+            current = counter.frame_index - 1
+            if stop is not None and current >= stop - 1:
+                # Same full-resolution exit test as phase 1 of the next shard
+                binary = figures.binarize(frame, dst=binary)
+                present = figures.has_figure(binary)
+                if current >= stop and prev_present and not present:
+                    break
+                prev_present = present
+    finally:
+        cap.release()
+
+    frames = 0 if counter is None else counter.frame_index - index
+    return {'events': events, 'frames': frames}
+
+
+def count_video_sharded(path, workers=None, warmup=30, **counter_options):
+    """Same result as count_video(), with the video split across processes.
+
+    The video is cut into `workers` equal frame ranges. Each worker moves
+    its cut forward to the next "no figure present" boundary. Per-shard
+    events are concatenated in order and renumbered. Videos whose frame
+    count the backend cannot report, and sources that cannot seek, are
+    processed sequentially. `warmup` frames before each cut are decoded and
+    dropped so the decoder settles after the seek.
+    """
+    workers = workers or os.cpu_count() or 1
+    cap = open_source(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {path}")
+    frame_count = cap.frame_count
+    seekable = cap.seekable
+    cap.release()
+
+    if workers < 2 or not seekable or frame_count < 2 * workers:
+        return count_video(path, **counter_options)
+
+    bounds = [frame_count * k // workers for k in range(workers)] + [None]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_count_shard, str(path), bounds[k], bounds[k + 1], warmup, counter_options)
+            for k in range(workers)
+        ]
+        shards = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    events = []
+    numbers = {figures.SIMPLE: 0, figures.DOUBLE: 0}
+    for shard in shards:
+        for event in shard['events']:
+            numbers[event['label']] += 1
+            event['number'] = numbers[event['label']]
+            events.append(event)
+
+    # Neighbouring shards both decode their shared boundary frame
+    frames = min(frame_count, sum(shard['frames'] for shard in shards))
+    return {
+        'video': str(path),
+        'totals': {
+            'total': len(events),
+            figures.SIMPLE: numbers[figures.SIMPLE],
+            figures.DOUBLE: numbers[figures.DOUBLE],
+        },
+        'events': events,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'workers': workers,
+    }
+
+
+def print_report(report, show_events=False):
+    if show_events:
+        for event in report['events']:
+            fallback = " (fallback)" if event['fallback'] else ""
+            print(f"frame {event['frame']:6d}  {event['label']} #{event['number']}{fallback}")
+    totals = report['totals']
+    print(f"Total: {totals['total']}")
+    print(f"Simple: {totals[figures.SIMPLE]}")
+    print(f"Double: {totals[figures.DOUBLE]}")
+    print(f"Frames: {report['frames']} in {report['seconds']:.2f} s ({report['fps']:.1f} fps)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless circle/ring counter")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    count = commands.add_parser("count", help="count Simple/Double figures in a video file")
+    count.add_argument("video", help="video file, camera index or synthetic:WxH@FPS/FRAMES")
+    count.add_argument("--frames", type=int, help="stop after this many frames")
+    count.add_argument("--capacity", type=int, default=64, help="frames kept per figure pass")
+    count.add_argument("--policy", choices=[DROP_OLDEST, DECIMATE], default=DROP_OLDEST)
+    count.add_argument("--workers", type=int, default=1,
+                       help="split the video across this many processes (0 = one per core)")
+    count.add_argument("--events", action="store_true", help="print one line per figure")
+    count.add_argument("--json", action="store_true", help="print the full report as JSON")
+    count.add_argument("--journal", help="append every event to this binary journal")
+    count.add_argument("--tracker", action="store_true",
+                       help="count each tracked object separately (sequential only)")
+    count.add_argument("--presence-scale", type=int, default=PRESENCE_SCALE,
+                       help="decimation of the presence check (1 = full resolution)")
+
+    args = parser.parse_args(argv)
+    options = {'buffer_capacity': args.capacity, 'buffer_policy': args.policy,
+               'presence_scale': args.presence_scale}
+    try:
+        if args.tracker:
+            report = count_video(args.video, max_frames=args.frames, tracking=True,
+                                 buffer_capacity=args.capacity)
+        elif args.workers == 1 or args.frames:
+            report = count_video(args.video, max_frames=args.frames, **options)
+        else:
+            report = count_video_sharded(args.video, workers=args.workers or None, **options)
+    except IOError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if args.journal:
+        with EventJournal(args.journal) as journal:
+            for event in report['events']:
+                journal.append_event(event)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, show_events=args.events)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+from framebuffer import FrameRingBuffer, DROP_OLDEST
+import topology
+
+
+THRESHOLD = 50
+SIMPLE = "Simple"
+DOUBLE = "Double"
+
+_UNKNOWN = -2
+_NO_CONTOURS = -1
+
+
+def binarize(frame, dst=None):
+    """Grayscale + fixed threshold used by every circle/ring detector"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, THRESHOLD, 255, cv2.THRESH_BINARY, dst=dst)
+    return binary
+
+
+def has_figure(binary):
+    """Same answer as "findContours finds something", without tracing contours"""
+    return topology.has_foreground(binary)
+
+
+def count_internal_contours(binary):
+    """Number of contours with a parent in the RETR_TREE hierarchy, None if no contours"""
+    return topology.internal_contours(binary)
+
+
+class FigureBuffer(FrameRingBuffer):
+    """Frame ring buffer that also carries each frame's binary mask and
+    internal-contour count.
+
+    The mask is stored when the caller already has it (the presence check
+    computes it for every frame) and filled lazily otherwise; the contour
+    count is computed at most once per buffered frame.
+    """
+    def __init__(self, capacity=64, policy=DROP_OLDEST):
+        super().__init__(capacity=capacity, policy=policy, with_plane=True)
+
+    def _allocate(self, frame):
+        super()._allocate(frame)
+        self._internal = np.full(self.capacity, _UNKNOWN, dtype=np.int32)
+
+    def _move(self, src, dst):
+        super()._move(src, dst)
+        self._internal[dst] = self._internal[src]
+
+    def append(self, frame, binary=None):
+        slot = super().append(frame, binary)
+        if slot is not None:
+            self._internal[slot] = _UNKNOWN
+        return slot
+
+    def binary(self, i):
+        return self.plane(i, compute=binarize)
+
+    def internal_contours(self, i):
+        slot = self._slot(i % len(self))
+        if self._internal[slot] == _UNKNOWN:
+            count = count_internal_contours(self.binary(i))
+            self._internal[slot] = _NO_CONTOURS if count is None else count
+        count = int(self._internal[slot])
+        return None if count == _NO_CONTOURS else count
+
+
+def classify_pass(buffer, mid_frame_idx, end_frame):
+    """Classify the figure buffered in `buffer`.
+
+    Frames are tried outward from `mid_frame_idx`; a frame with one internal
+    contour is a Simple circle, two is a Double. A frame with more than two
+    falls back to looking for a Double in the last 10 frames before
+    `end_frame`. Returns (label, buffer index of the deciding frame,
+    fallback) or None if nothing matched.
+    """
+    frame_offset = 0
+    while frame_offset < len(buffer):
+        test_idx = (
+            mid_frame_idx - frame_offset
+            if frame_offset % 2 == 0
+            else mid_frame_idx + (frame_offset + 1) // 2
+        )
+
+        if 0 <= test_idx < len(buffer):
+            internal_contours = buffer.internal_contours(test_idx)
+            if internal_contours == 1:
+                return SIMPLE, test_idx, False
+            if internal_contours == 2:
+                return DOUBLE, test_idx, False
+            if internal_contours is not None and internal_contours > 2:
+                for back_idx in range(end_frame - 10, end_frame):
+                    if 0 <= back_idx < len(buffer) and buffer.internal_contours(back_idx) == 2:
+                        return DOUBLE, back_idx, True
+
+        frame_offset += 1
+    return None
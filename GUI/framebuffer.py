@@ -0,0 +1,148 @@
+import numpy as np
+
+
+DROP_OLDEST = "drop_oldest"
+DECIMATE = "decimate"
+
+
+class FrameRingBuffer():
+    """Fixed-capacity frame store backed by one preallocated (N,H,W,3) array.
+
+    Frames are copied into their slot, so appending never allocates once the
+    storage exists. When the buffer is full the policy decides what to lose:
+
+    * ``drop_oldest`` overwrites the oldest frame.
+    * ``decimate`` keeps every other stored frame and from then on only
+      stores every 2nd, 4th, ... incoming frame, so a long pass is still
+      covered from start to end at a coarser step.
+
+    Each incoming frame gets a sequence number (counting from the last
+    ``clear()``), which lets callers remember "where a figure started" and
+    translate it back into a buffer position with ``position()`` even after
+    frames were dropped.
+
+    With ``with_plane=True`` every slot also has a single-channel (H,W)
+    companion image (a binary mask, an enhanced grayscale...) that callers
+    store next to the frame instead of recomputing it later.
+    """
+    def __init__(self, capacity=64, policy=DROP_OLDEST, with_plane=False):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        if policy not in (DROP_OLDEST, DECIMATE):
+            raise ValueError(f"unknown policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.with_plane = with_plane
+        self._frames = None
+        self._planes = None
+        self._seqs = np.zeros(capacity, dtype=np.int64)
+        self.clear()
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self._next_seq = 0
+        self._stride = 1
+        self.dropped = 0
+
+    def _allocate(self, frame):
+        self._frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+        if self.with_plane:
+            self._planes = np.empty((self.capacity,) + frame.shape[:2], dtype=np.uint8)
+            self._has_plane = np.zeros(self.capacity, dtype=bool)
+        self.clear()
+
+    def _slot(self, i):
+        return (self._head + i) % self.capacity
+
+    def _move(self, src, dst):
+        """Copy slot `src` into slot `dst`; subclasses move their extra planes too"""
+        self._frames[dst] = self._frames[src]
+        self._seqs[dst] = self._seqs[src]
+        if self.with_plane:
+            self._planes[dst] = self._planes[src]
+            self._has_plane[dst] = self._has_plane[src]
+
+    def _compact(self):
+        kept = 0
+        for i in range(0, self._size, 2):
+            if kept != i:
+                self._move(self._slot(i), self._slot(kept))
+            kept += 1
+        self.dropped += self._size - kept
+        self._size = kept
+        self._stride *= 2
+
+    def _reserve(self):
+        """Return the slot index the next frame goes into"""
+        if self._size == self.capacity:
+            if self.policy == DROP_OLDEST:
+                self._head = self._slot(1)
+                self._size -= 1
+                self.dropped += 1
+            else:
+                self._compact()
+        slot = self._slot(self._size)
+        self._size += 1
+        return slot
+
+    def append(self, frame, plane=None):
+        """Store a copy of `frame` (and its plane); returns its slot or None if decimated away"""
+        if self._frames is None or self._frames.shape[1:] != frame.shape:
+            self._allocate(frame)
+        seq = self._next_seq
+        self._next_seq += 1
+        if seq % self._stride:
+            self.dropped += 1
+            return None
+        slot = self._reserve()
+        np.copyto(self._frames[slot], frame)
+        self._seqs[slot] = seq
+        if self.with_plane:
+            if plane is not None:
+                np.copyto(self._planes[slot], plane)
+            self._has_plane[slot] = plane is not None
+        return slot
+
+    def plane(self, i, compute=None):
+        """Companion plane of position `i`.
+
+        If none was stored, `compute(frame, dst)` fills it in place and the
+        result is kept; without `compute` None is returned.
+        """
+        frame = self[i]
+        slot = self._slot(i % self._size)
+        if not self._has_plane[slot]:
+            if compute is None:
+                return None
+            compute(frame, self._planes[slot])
+            self._has_plane[slot] = True
+        return self._planes[slot]
+
+    @property
+    def next_seq(self):
+        """Sequence number the next appended frame will get"""
+        return self._next_seq
+
+    def position(self, seq):
+        """Buffer position of the first stored frame with sequence >= `seq`"""
+        for i in range(self._size):
+            if self._seqs[self._slot(i)] >= seq:
+                return i
+        return self._size
+
+    def seq_at(self, i):
+        """Sequence number of the frame stored at buffer position `i`"""
+        if i < 0:
+            i += self._size
+        return int(self._seqs[self._slot(i)])
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("frame buffer index out of range")
+        return self._frames[self._slot(i)]
@@ -1,13 +1,27 @@
 from logger import Logger
+import queue
 import tkinter as tk
-from PIL import Image, ImageTk
 import cv2
 import camera
 import tkinter.font as font
 import numpy as np
+from framebuffer import DROP_OLDEST
+import figures
+import counter
+from journal import EventJournal
+from render import PaneRenderer
+from scheduler import DisplayScheduler
+from transport import ProcessPipeline
+from tracker import FigureTracker
+from sources import open_source
+
+# Most frames a playback tick decodes and counts before yielding to Tk
+MAX_CATCHUP_FRAMES = 8
  
 class Application(tk.Frame):
-    def __init__(self, master=None):
+    def __init__(self, master=None, buffer_capacity=64, buffer_policy=DROP_OLDEST,
+                 camera_src=0, video_src="contornos/camara/video_1_12.avi",
+                 journal_path="GUI/logs/events.evj", display_fps=30, tracking=False):
         super().__init__(master)
         self.logReport = Logger('LoggerApp')
         self.logReport.logger.info(f"[INFO] Initializing constructor Application ...")
@@ -19,12 +33,17 @@ class Application(tk.Frame):
         
         # Video analysis variables
         self.video_cap = None
-        self.total_figures = 0
-        self.circles = 0
-        self.rings = 0
-        self.figure_present = False
-        self.start_frame = 0
-        self.frames_buffer = []
+        self.camera_src = camera_src
+        self.cameras = camera.CameraSupervisor()
+        self.video_src = video_src
+        self.journal_path = journal_path
+        self.journal = None
+        self.display_fps = display_fps
+        self.tracking = tracking
+        self.pendingFrame = None
+        self.buffer_capacity = buffer_capacity
+        self.buffer_policy = buffer_policy
+        self.figureCounter = self.createCounter()
         self.video_running = False
  
         #Create Widgets
@@ -56,22 +75,22 @@ class Application(tk.Frame):
        
         self.labelVideo3.place(x=690, y=40)
         
-        self.createImageZeros()
-        self.labelVideo1.configure(image=self.imgTk)
-        self.labelVideo1.image = self.imgTk
+        # One persistent PhotoImage per pane, updated in place every frame
+        self.renderVideo1 = PaneRenderer(self.labelVideo1)
+        self.renderVideo2 = PaneRenderer(self.labelVideo2)
+        self.renderVideo3 = PaneRenderer(self.labelVideo3)
         
-        # Configure second and third video with same image
-        self.labelVideo2.configure(image=self.imgTk)
-        self.labelVideo2.image = self.imgTk
+        # Redraws run at display_fps whatever the camera or file delivers
+        self.cameraScheduler = DisplayScheduler(self.labelVideo1, fps=self.display_fps)
+        self.videoScheduler = DisplayScheduler(self.labelVideo2, fps=self.display_fps)
         
-        self.labelVideo3.configure(image=self.imgTk)
-        self.labelVideo3.image = self.imgTk
+        self.createImageZeros()
+        self.renderVideo1.show(self.frame)
+        self.renderVideo2.show(self.frame)
+        self.renderVideo3.show(self.frame)
  
     def createImageZeros(self):
         self.frame = np.zeros([480, 320, 3], dtype=np.uint8)
-        self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-        imgArray = Image.fromarray(self.frame)
-        self.imgTk = ImageTk.PhotoImage(image=imgArray)
        
  
  
@@ -142,7 +161,7 @@ class Application(tk.Frame):
             bg="#D62828",
             fg='#ffffff',
             width=12,
-            command=self.stopCamera()
+            command=self.stopCamera
         )
         self.btnStopCamera.place(x=250, y=600)
         
@@ -168,32 +187,61 @@ class Application(tk.Frame):
         )
         self.btnStopVideo.place(x=500, y=600) 
     def initCamera(self):
-        self.camera1 = camera.RunCamera(src=0, name="Camera_1")
-        self.camera1.start()
+        if "Camera_1" not in self.cameras.cameras:
+            # Counting runs in its own process, fed through shared memory
+            self.camera1 = self.cameras.add(
+                self.camera_src,
+                name="Camera_1",
+                pipeline=ProcessPipeline([counter.counter_pipeline]),
+            )
+        self.cameraScheduler.reset()
+        self.cameras.restart("Camera_1")
         self.showVideo()
  
-    def convertToFrameTk(self,frame):
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        imgArray = Image.fromarray(frame)
-        return ImageTk.PhotoImage(image=imgArray)
-       
- 
     def showVideo(self):
         try:
-            if self.camera1.ret is not None:
-                imgtk = self.convertToFrameTk(self.camera1.frame)
-                self.labelVideo1.configure(image=imgtk)
-                self.labelVideo1.image = imgtk
-            self.labelVideo1.after(10, self.showVideo)
+            # Only redraw when the camera thread published something new
+            seq, ret, frame = self.camera1.slot.latest()
+            if ret and self.cameraScheduler.newer(seq):
+                self.renderVideo1.show(frame)
+            self.pollCameraResults()
+            self.cameraScheduler.after(self.showVideo)
                  
                
         except Exception as e:
             self.logReport.logger.error(f"[ERROR] Error in showVideo: {e}")
        
  
+    def pollCameraResults(self):
+        """Log the figures the camera analysis processes counted"""
+        while True:
+            try:
+                name, _, results = self.cameras.results.get_nowait()
+            except queue.Empty:
+                return
+            for _, _, _, event in results:
+                self.logReport.logger.info(f"[INFO] {name}: {event['label']} circle detected #{event['number']}")
+    
     def stopCamera(self):
-        pass
+        self.cameraScheduler.cancel()
+        self.cameras.stop()
+        self.pollCameraResults()
+        for name, stats in self.cameras.stats().items():
+            self.logReport.logger.info(
+                f"[INFO] {name}: {stats['frames']} frames, {stats['fps']:.1f} fps, "
+                f"{stats['decode_ms']:.1f} ms decode, {stats['failures']} failures, {stats['reconnects']} reconnects"
+            )
     
+    def createCounter(self):
+        if self.tracking:
+            # One event per tracked object, also with several figures in view
+            return FigureTracker(buffer_capacity=self.buffer_capacity, keep_detection=True)
+        return counter.FigureCounter(
+            buffer_capacity=self.buffer_capacity,
+            buffer_policy=self.buffer_policy,
+            keep_detection=True,
+        )
+
     def updateCounters(self, group1_count, group2_count):
         """Update the counter labels with new values"""
         self.labelCount1Value.configure(text=str(group1_count))
@@ -202,38 +250,33 @@ class Application(tk.Frame):
     def updateVideo2(self, frame):
         """Update the second video display with a new frame"""
         try:
-            imgtk = self.convertToFrameTk(frame)
-            self.labelVideo2.configure(image=imgtk)
-            self.labelVideo2.image = imgtk
+            self.renderVideo2.show(frame)
         except Exception as e:
             self.logReport.logger.error(f"[ERROR] Error in updateVideo2: {e}")
     
     def updateVideo3(self, frame):
         """Update the third video display with detection results"""
         try:
-            imgtk = self.convertToFrameTk(frame)
-            self.labelVideo3.configure(image=imgtk)
-            self.labelVideo3.image = imgtk
+            self.renderVideo3.show(frame)
         except Exception as e:
             self.logReport.logger.error(f"[ERROR] Error in updateVideo3: {e}")
     
     def startVideoAnalysis(self):
         """Start the video analysis with real-time counting"""
         try:
-            self.video_cap = cv2.VideoCapture("contornos/camara/video_1_12.avi")
+            self.video_cap = open_source(self.video_src)
             if not self.video_cap.isOpened():
                 self.logReport.logger.error("[ERROR] Could not open video file")
                 return
             
             self.video_running = True
-            self.total_figures = 0
-            self.circles = 0
-            self.rings = 0
-            self.figure_present = False
-            self.start_frame = 0
-            self.frames_buffer = []
+            self.figureCounter = self.createCounter()
+            self.pendingFrame = None
+            self.videoScheduler.reset()
+            if self.journal_path:
+                self.journal = EventJournal(self.journal_path)
             
-            self.updateCounters(self.circles, self.rings)
+            self.updateCounters(self.figureCounter.circles, self.figureCounter.rings)
             self.processVideoFrame()
             
         except Exception as e:
@@ -242,172 +285,120 @@ class Application(tk.Frame):
     def stopVideoAnalysis(self):
         """Stop the video analysis"""
         self.video_running = False
+        self.videoScheduler.cancel()
+        self.pendingFrame = None
         if self.video_cap:
             self.video_cap.release()
             self.video_cap = None
-        self.logReport.logger.info(f"[INFO] Video stopped. Total: {self.total_figures}, Simple: {self.circles}, Double: {self.rings}")
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        totals = self.figureCounter.totals
+        self.logReport.logger.info(f"[INFO] Video stopped. Total: {totals['total']}, Simple: {totals[figures.SIMPLE]}, Double: {totals[figures.DOUBLE]}")
+        stats = self.videoScheduler.stats
+        self.logReport.logger.info(f"[INFO] Video display: {stats['rendered']} drawn, {stats['dropped']} dropped, {stats['duplicated']} duplicated")
     
     def processVideoFrame(self):
-        """Process each frame of the video with the same logic as video.py"""
+        """Count every frame of the video and draw it when it is due.
+
+        Frames are paced by the source timestamps. Every frame goes through
+        the counter, but when several are due in one tick only the newest one
+        is drawn.
+        """
         if not self.video_running or not self.video_cap:
             return
         
         try:
-            ret, frame = self.video_cap.read()
-            if not ret:
-                self.stopVideoAnalysis()
-                self.logReport.logger.info("[INFO] Video finished")
-                return
-            
-            # Display the current frame
-            self.updateVideo2(frame)
-            
-            # Apply the same logic as video.py
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            _, binary = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY)
-            
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            has_figure = len(contours) > 0
-            
-            if has_figure and not self.figure_present:
-                self.figure_present = True
-                self.start_frame = len(self.frames_buffer)
-            
-            elif not has_figure and self.figure_present:
-                self.figure_present = False
-                end_frame = len(self.frames_buffer)
-                mid_frame_idx = (self.start_frame + end_frame) // 2
+            drawFrame = None
+            delay = 0
+            finished = False
+            for _ in range(MAX_CATCHUP_FRAMES):
+                if self.pendingFrame is None:
+                    ret, frame = self.video_cap.read()
+                    if not ret:
+                        finished = True
+                        break
+                    seq = self.countVideoFrame(frame)
+                    self.pendingFrame = (seq, self.videoTimestamp(seq), frame)
                 
-                if mid_frame_idx < len(self.frames_buffer):
-                    self.classifyFigure(mid_frame_idx, end_frame)
-                
-                self.frames_buffer = []
+                delay = self.videoScheduler.delay_until(self.pendingFrame[1])
+                if delay > 0:
+                    break
+                drawFrame, self.pendingFrame = self.pendingFrame, None
+                delay = 0
             
-            self.frames_buffer.append(frame.copy())
+            if drawFrame is None:
+                self.videoScheduler.hold()
+            elif self.videoScheduler.newer(drawFrame[0]):
+                self.updateVideo2(drawFrame[2])
+                delay = max(delay, self.videoScheduler.period_ms)
             
-            # Schedule next frame processing
-            self.labelVideo2.after(30, self.processVideoFrame)
+            if finished:
+                self.stopVideoAnalysis()
+                self.logReport.logger.info("[INFO] Video finished")
+                return
+            self.videoScheduler.after(self.processVideoFrame, delay)
             
         except Exception as e:
             self.logReport.logger.error(f"[ERROR] Error processing video frame: {e}")
     
-    def classifyFigure(self, mid_frame_idx, end_frame):
-        """Classify the detected figure - EXACT SAME LOGIC AS video.py + show detection frame"""
+    def countVideoFrame(self, frame):
+        """Same logic as video.py, shared through the headless counter; returns the frame number"""
+        events = counter.events_of(self.figureCounter.process(frame))
+        self.logReport.debug_limited(
+            'video_frame',
+            f"[DEBUG] Video frame {self.figureCounter.frame_index}, figure present: {self.figureCounter.figure_present}",
+        )
+        for event in events:
+            event['timestamp'] = self.video_cap.timestamp
+            self.showDetection(event)
+        return self.figureCounter.frame_index
+    
+    def videoTimestamp(self, seq):
+        """Source time of frame `seq` in ms, from the frame rate if the source has no clock"""
+        timestamp = self.video_cap.timestamp
+        if timestamp <= 0 and seq > 1:
+            timestamp = (seq - 1) * 1000.0 / (self.video_cap.fps or 30.0)
+        return timestamp
+    
+    def showDetection(self, event):
+        """Show a classified figure in the third video box and update counters"""
         try:
-            classified = False
-            frame_offset = 0
+            if self.journal:
+                self.journal.append_event(event)
+            detection_img = event['binary']
             
-            while not classified and frame_offset < len(self.frames_buffer):
-                test_idx = (
-                    mid_frame_idx - frame_offset
-                    if frame_offset % 2 == 0
-                    else mid_frame_idx + (frame_offset + 1) // 2
-                )
-                
-                if 0 <= test_idx < len(self.frames_buffer):
-                    test_frame = self.frames_buffer[test_idx]
-                    test_gray = cv2.cvtColor(test_frame, cv2.COLOR_BGR2GRAY)
-                    _, test_binary = cv2.threshold(test_gray, 50, 255, cv2.THRESH_BINARY)
-                    
-                    contours, hierarchy = cv2.findContours(
-                        test_binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE
-                    )
-                    
-                    if hierarchy is not None:
-                        internal_contours = 0
-                        for i in range(len(hierarchy[0])):
-                            if hierarchy[0][i][3] != -1:
-                                internal_contours += 1
-                        
-                        if internal_contours == 1 or internal_contours == 2:
-                            self.total_figures += 1
-                            
-                            # Create detection image (same as video.py)
-                            detection_img = test_binary.copy()
-                            
-                            if internal_contours == 1:
-                                self.circles += 1
-                                cv2.putText(
-                                    detection_img,
-                                    f"Simple #{self.circles}",
-                                    (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX,
-                                    1,
-                                    (255, 255, 255),
-                                    2,
-                                )
-                                self.logReport.logger.info(f"[INFO] Simple circle detected #{self.circles}")
-                                
-                            elif internal_contours == 2:
-                                self.rings += 1
-                                cv2.putText(
-                                    detection_img,
-                                    f"Doble #{self.rings}",
-                                    (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX,
-                                    1,
-                                    (255, 255, 255),
-                                    2,
-                                )
-                                self.logReport.logger.info(f"[INFO] Double circle detected #{self.rings}")
-                            
-                            # Convert binary to 3-channel for display
-                            detection_img_color = cv2.cvtColor(detection_img, cv2.COLOR_GRAY2BGR)
-                            
-                            # Show detection in third video box
-                            self.updateVideo3(detection_img_color)
-                            
-                            # Update GUI counters in real-time
-                            self.updateCounters(self.circles, self.rings)
-                            classified = True
-                            
-                        elif internal_contours > 2:
-                            # Check previous frames for double circles - EXACT SAME AS video.py
-                            for back_idx in range(end_frame - 10, end_frame):
-                                if back_idx >= 0 and back_idx < len(self.frames_buffer):
-                                    back_frame = self.frames_buffer[back_idx]
-                                    back_gray = cv2.cvtColor(back_frame, cv2.COLOR_BGR2GRAY)
-                                    _, back_binary = cv2.threshold(back_gray, 50, 255, cv2.THRESH_BINARY)
-                                    
-                                    back_contours, back_hierarchy = cv2.findContours(
-                                        back_binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE
-                                    )
-                                    
-                                    if back_hierarchy is not None:
-                                        back_internal = 0
-                                        for i in range(len(back_hierarchy[0])):
-                                            if back_hierarchy[0][i][3] != -1:
-                                                back_internal += 1
-                                        
-                                        if back_internal == 2:
-                                            self.total_figures += 1
-                                            self.rings += 1
-                                            
-                                            # Create detection image
-                                            detection_img = back_binary.copy()
-                                            cv2.putText(
-                                                detection_img,
-                                                f"Doble #{self.rings}",
-                                                (10, 30),
-                                                cv2.FONT_HERSHEY_SIMPLEX,
-                                                1,
-                                                (255, 255, 255),
-                                                2,
-                                            )
-                                            
-                                            # Convert and show detection
-                                            detection_img_color = cv2.cvtColor(detection_img, cv2.COLOR_GRAY2BGR)
-                                            self.updateVideo3(detection_img_color)
-                                            
-                                            self.logReport.logger.info(f"[INFO] Double circle detected (fallback) #{self.rings}")
-                                            self.updateCounters(self.circles, self.rings)
-                                            classified = True
-                                            break
-                
-                frame_offset += 1
+            if event['label'] == figures.SIMPLE:
+                text = f"Simple #{event['number']}"
+                self.logReport.logger.info(f"[INFO] Simple circle detected #{event['number']}")
+            else:
+                text = f"Doble #{event['number']}"
+                if event['fallback']:
+                    self.logReport.logger.info(f"[INFO] Double circle detected (fallback) #{event['number']}")
+                else:
+                    self.logReport.logger.info(f"[INFO] Double circle detected #{event['number']}")
+            
+            cv2.putText(
+                detection_img,
+                text,
+                (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                1,
+                (255, 255, 255),
+                2,
+            )
+            
+            # Convert binary to 3-channel for display
+            detection_img_color = cv2.cvtColor(detection_img, cv2.COLOR_GRAY2BGR)
+            
+            # Show detection in third video box
+            self.updateVideo3(detection_img_color)
+            
+            # Update GUI counters in real-time
+            self.updateCounters(self.figureCounter.circles, self.figureCounter.rings)
                 
         except Exception as e:
-            self.logReport.logger.error(f"[ERROR] Error in classifyFigure: {e}")
+            self.logReport.logger.error(f"[ERROR] Error in showDetection: {e}")
        
  
  
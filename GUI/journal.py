@@ -0,0 +1,166 @@
+"""Append-only binary journal of detections.
+
+A journal file is a 16-byte header followed by fixed-size records of
+EVENT_DTYPE, so a whole shift can be opened with ``load()`` as a read-only
+numpy memmap and queried with vectorized numpy instead of parsing logs.
+
+Usage (from the GUI directory, or with GUI on PYTHONPATH):
+
+    python -m journal summary logs/events.evj
+"""
+import argparse
+import os
+import struct
+import sys
+import numpy as np
+
+
+MAGIC = b"VAEVENT1"
+_HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+HEADER_SIZE = _HEADER.size
+
+EVENT_DTYPE = np.dtype([
+    ('frame', '<i8'),              # frame index of the deciding frame
+    ('timestamp', '<f8'),          # ms since the start of the source
+    ('label', 'S16'),              # "Simple", "Double", "bien fabricada", ...
+    ('color', 'S16'),              # piece color, empty when not measured
+    ('cx', '<f4'),                 # centroid, NaN when unknown
+    ('cy', '<f4'),
+    ('area', '<f4'),               # figure area in pixels, NaN when unknown
+    ('internal_contours', '<i2'),  # -1 when not measured
+    ('reserved', 'V2'),            # pads records to 64 bytes
+])
+# Room for the label and color, in bytes of UTF-8
+TEXT_BYTES = EVENT_DTYPE['label'].itemsize
+
+
+def _text(value):
+    """`value` as UTF-8 cut to TEXT_BYTES, never in the middle of a character"""
+    encoded = (value or "").encode('utf-8')[:TEXT_BYTES]
+    return encoded.decode('utf-8', 'ignore').encode('utf-8')
+
+
+class EventJournal():
+    """Writer for a journal file; appends to it if it already exists.
+
+    Records are buffered and written in blocks of `flush_every`; ``close()``
+    (or leaving the ``with`` block) writes the rest.
+    """
+    def __init__(self, path, flush_every=64):
+        self.path = str(path)
+        self.flush_every = flush_every
+        self._pending = np.zeros(flush_every, dtype=EVENT_DTYPE)
+        self._count = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, EVENT_DTYPE.itemsize, 0))
+        else:
+            _check_header(self.path)
+            # Drop a record cut in half by a crash so the file stays aligned
+            size = self._file.tell()
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // EVENT_DTYPE.itemsize * EVENT_DTYPE.itemsize
+            if whole != size:
+                self._file.truncate(whole)
+                self._file.seek(whole)
+
+    def append(self, frame, label, timestamp=0.0, color="", centroid=None,
+               area=None, internal_contours=None):
+        record = self._pending[self._count]
+        record['frame'] = frame
+        record['timestamp'] = timestamp
+        record['label'] = _text(label)
+        record['color'] = _text(color)
+        record['cx'], record['cy'] = centroid if centroid is not None else (np.nan, np.nan)
+        record['area'] = np.nan if area is None else area
+        record['internal_contours'] = -1 if internal_contours is None else internal_contours
+        self._count += 1
+        if self._count == self.flush_every:
+            self.flush()
+
+    def append_event(self, event, color=""):
+        """Append a FigureCounter event dict"""
+        self.append(
+            event['frame'],
+            event['label'],
+            timestamp=event.get('timestamp', 0.0),
+            color=color,
+            centroid=event.get('centroid'),
+            area=event.get('area'),
+            internal_contours=event.get('internal_contours'),
+        )
+
+    def flush(self):
+        if self._count:
+            self._file.write(self._pending[:self._count].tobytes())
+            self._count = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is not an event journal")
+    magic, record_size, _ = _HEADER.unpack(header)
+    if magic != MAGIC or record_size != EVENT_DTYPE.itemsize:
+        raise ValueError(f"{path} is not an event journal of this version")
+
+
+def load(path):
+    """Memory-map every complete record of a journal (read-only)"""
+    _check_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // EVENT_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def summary(records):
+    """Counts per label and per (label, color), computed with np.unique"""
+    labels, label_counts = np.unique(records['label'], return_counts=True)
+    pairs = np.stack([records['label'], records['color']], axis=1) if len(records) else np.zeros((0, 2), 'S16')
+    combos, combo_counts = np.unique(pairs, axis=0, return_counts=True)
+    return {
+        'total': int(len(records)),
+        'labels': {label.decode(): int(n) for label, n in zip(labels, label_counts)},
+        'colors': {
+            (label.decode(), color.decode()): int(n)
+            for (label, color), n in zip(combos, combo_counts)
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="count the events of a journal")
+    summary_parser.add_argument("journal")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        report = summary(load(args.journal))
+        print(f"Total: {report['total']}")
+        for label, n in report['labels'].items():
+            print(f"{label}: {n}")
+        for (label, color), n in report['colors'].items():
+            if color:
+                print(f"  {label} / {color}: {n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,184 @@
+import atexit
 import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from colorlog import ColoredFormatter
- 
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """FileHandler that flushes every `batch_size` records or `flush_interval`
+    seconds instead of after every record. Errors are flushed right away.
+
+    The interval is only checked when a record arrives; whoever feeds the
+    handler calls ``flush_pending()`` when no more records are coming
+    (_FlushingQueueListener does it once its queue has been idle for
+    `flush_interval`), so the last records of a burst are not held back.
+    """
+    def __init__(self, filename, mode='a', encoding=None, batch_size=64, flush_interval=1.0):
+        super().__init__(filename, mode=mode, encoding=encoding)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if (record.levelno >= logging.ERROR
+                    or self._pending >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush_pending(self):
+        """Flush if records were written since the last flush"""
+        if self._pending:
+            self.flush()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the message on the caller's thread; the
+    records only cross threads here, so they can be queued as they are.
+    """
+    def prepare(self, record):
+        return record
+
+
+class _FlushingQueueListener(QueueListener):
+    """QueueListener that flushes its batched handlers when the queue has
+    been empty for `flush_interval` seconds"""
+    def __init__(self, log_queue, *handlers, flush_interval=1.0, **kwargs):
+        super().__init__(log_queue, *handlers, **kwargs)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        if not block:
+            return self.queue.get(block=False)
+        while True:
+            try:
+                return self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    if isinstance(handler, BatchedFileHandler):
+                        handler.flush_pending()
+
+
+# One background listener per log file, shared by every named logger
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def _create_handlers(log_file, level, batch_size, flush_interval):
+    ## Handler write in console
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_formatter = ColoredFormatter(
+        "%(log_color)s%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        log_colors={
+            'DEBUG':    'cyan',
+            'INFO':     'green',
+            'WARNING':  'yellow',
+            'ERROR':    'red',
+            'CRITICAL': 'red,bg_white',
+        }
+    )
+    console_handler.setFormatter(console_formatter)
+
+    ## Handler write in log
+    file_handler = BatchedFileHandler(log_file, mode='a', encoding='utf-8',
+                                      batch_size=batch_size, flush_interval=flush_interval)
+    file_handler.setLevel(level)
+    file_formatter = ColoredFormatter(
+        "%(asctime)s - %(name)s %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    file_handler.setFormatter(file_formatter)
+    return console_handler, file_handler
+
+
+def _get_queue(log_file, level, batch_size, flush_interval):
+    with _listeners_lock:
+        if log_file not in _listeners:
+            log_queue = queue.SimpleQueue()
+            handlers = _create_handlers(log_file, level, batch_size, flush_interval)
+            listener = _FlushingQueueListener(log_queue, *handlers, respect_handler_level=True,
+                                              flush_interval=flush_interval)
+            listener.start()
+            _listeners[log_file] = (log_queue, listener)
+        return _listeners[log_file][0]
+
+
+def shutdown():
+    """Drain every queue and close the files (also run at interpreter exit)"""
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for _, listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown)
+
+
 class Logger:
-    def __init__(self, name, log_file="GUI/logs/app.log", level=logging.DEBUG):
+    """Named logger whose records are formatted and written by a background
+    thread, so logging from the Tk callbacks or the camera thread only costs
+    a queue put."""
+    def __init__(self, name, log_file="GUI/logs/app.log", level=logging.DEBUG,
+                 batch_size=64, flush_interval=1.0):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.DEBUG)
         self.log_file = log_file
+        self._limited = {}
         if not self.logger.handlers:
-            ## Handler write in console
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(level)
-            console_formatter = ColoredFormatter(
-                "%(log_color)s%(asctime)s - %(levelname)s - %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-                log_colors={
-                    'DEBUG':    'cyan',
-                    'INFO':     'green',
-                    'WARNING':  'yellow',
-                    'ERROR':    'red',
-                    'CRITICAL': 'red,bg_white',
-                }
-            )
-            console_handler.setFormatter(console_formatter)
- 
-            ## Handler write in log
-            file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-            file_handler.setLevel(level)
-            file_formatter = ColoredFormatter(
-                "%(asctime)s - %(name)s %(levelname)s - %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S"
-            )
-            file_handler.setFormatter(file_formatter)
- 
-            ## add handlers to logger
-            self.logger.addHandler(console_handler)
-            self.logger.addHandler(file_handler)
-   
+            log_queue = _get_queue(log_file, level, batch_size, flush_interval)
+            self.logger.addHandler(_DeferredQueueHandler(log_queue))
+
     def debug(self, msg):
         self.logger.debug(msg)
- 
+
+    def debug_limited(self, key, msg, interval=1.0):
+        """Debug message logged at most once per `interval` seconds per `key`.
+
+        Meant for per-frame messages; the number of calls skipped since the
+        last one is appended to the message.
+        """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        now = time.monotonic()
+        last, skipped = self._limited.get(key, (None, 0))
+        if last is not None and now - last < interval:
+            self._limited[key] = (last, skipped + 1)
+            return
+        self._limited[key] = (now, 0)
+        if skipped:
+            msg = f"{msg} (+{skipped} skipped)"
+        self.logger.debug(msg)
+
     def info(self, msg):
         self.logger.info(msg)
- 
+
     def warning(self, msg):
         self.logger.warning(msg)
- 
+
     def error(self, msg):
         self.logger.error(msg)
-   
+
     def critical(self, msg):
-        self.logger.critical(msg)
\ No newline at end of file
+        self.logger.critical(msg)
@@ -0,0 +1,67 @@
+"""First tier of the detectors: "is there a figure?" on a decimated frame.
+
+Most conveyor frames are empty, and answering that at full resolution
+(grayscale, threshold, contours) used to be the bulk of the per-frame work.
+PresenceDetector answers it on a copy shrunk by `scale` with nearest
+neighbour sampling, about 1/scale² of the pixels; the full-resolution
+analysis is left to the frames a counter actually classifies.
+"""
+import cv2
+import numpy as np
+import figures
+import topology
+
+
+class PresenceDetector():
+    """Thresholds a `scale`-times smaller copy of each frame.
+
+    `preprocess(small)` may adjust the small BGR frame before the grayscale
+    conversion (e.g. the contrast enhancement of the inspection GUI). With
+    `min_area` (in full-resolution pixels) only contours at least that big
+    count as a figure; without it any foreground pixel does, like
+    figures.has_figure.
+    """
+    def __init__(self, scale=4, threshold=figures.THRESHOLD, min_area=0.0, preprocess=None):
+        if scale < 1:
+            raise ValueError("scale must be at least 1")
+        self.scale = scale
+        self.threshold = threshold
+        self.min_area = min_area
+        self.preprocess = preprocess
+        self._small = None
+        self._gray = None
+        self._binary = None
+
+    def _allocate(self, frame):
+        height, width = frame.shape[:2]
+        size = (max(1, width // self.scale), max(1, height // self.scale))
+        self._small = np.empty((size[1], size[0]) + frame.shape[2:], dtype=np.uint8)
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._binary = np.empty_like(self._gray)
+        self._shape = frame.shape
+
+    def binary(self, frame):
+        """Thresholded small copy of `frame`, reused between calls"""
+        if self._small is None or self._shape != frame.shape:
+            self._allocate(frame)
+        size = (self._small.shape[1], self._small.shape[0])
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_NEAREST)
+        small = self._small if self.preprocess is None else self.preprocess(self._small)
+        if small.ndim == 3:
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            gray = self._gray
+        else:
+            gray = small
+        cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY, dst=self._binary)
+        return self._binary
+
+    def contours(self, frame):
+        """Outer contours of at least `min_area`, in full-resolution coordinates"""
+        contours, _ = cv2.findContours(self.binary(frame), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = self.min_area / self.scale ** 2
+        return [contour * self.scale for contour in contours if cv2.contourArea(contour) > min_area]
+
+    def __call__(self, frame):
+        if self.min_area:
+            return len(self.contours(frame)) > 0
+        return topology.has_foreground(self.binary(frame))
@@ -0,0 +1,65 @@
+"""Tk rendering that reuses one PhotoImage per pane.
+
+Building an ``ImageTk.PhotoImage`` per displayed frame allocates a new Tk
+image every time. ``PaneRenderer`` keeps one per label and pastes each new
+frame into it from a preallocated RGBA buffer; PIL maps that buffer
+directly (``Image.frombuffer``), so the only copy is the one into Tk.
+"""
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+_TO_RGBA = {
+    1: cv2.COLOR_GRAY2RGBA,
+    3: cv2.COLOR_BGR2RGBA,
+    4: cv2.COLOR_BGRA2RGBA,
+}
+
+
+class PaneRenderer():
+    """Draws frames into a Tk label through one persistent PhotoImage.
+
+    With `size=(width, height)` every frame is scaled to that size with
+    INTER_AREA into a preallocated buffer; without it the pane follows the
+    frame size. Accepts BGR, BGRA or single-channel frames, or RGB with
+    ``show(frame, rgb=True)``.
+    """
+    def __init__(self, label, size=None):
+        self.label = label
+        self.size = size
+        self.photo = None
+        self._rgba = None
+        self._image = None
+        self._resized = None
+
+    def _allocate(self, width, height):
+        self._rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        self._rgba[..., 3] = 255
+        # Shares memory with self._rgba: writing the array updates the image
+        self._image = Image.frombuffer("RGBA", (width, height), self._rgba, "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage("RGBA", (width, height))
+        self.label.configure(image=self.photo)
+        self.label.image = self.photo
+
+    def prepare(self, frame, rgb=False):
+        """Scale and convert `frame` into the RGBA buffer; returns the buffer"""
+        height, width = frame.shape[:2]
+        size = self.size or (width, height)
+        if self._rgba is None or self._rgba.shape[1::-1] != size:
+            self._allocate(*size)
+        if (width, height) != size:
+            channels = frame.shape[2:] or ()
+            shape = (size[1], size[0]) + tuple(channels)
+            if self._resized is None or self._resized.shape != shape or self._resized.dtype != frame.dtype:
+                self._resized = np.empty(shape, dtype=frame.dtype)
+            cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+            frame = self._resized
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        code = cv2.COLOR_RGB2RGBA if rgb and channels == 3 else _TO_RGBA[channels]
+        cv2.cvtColor(frame, code, dst=self._rgba)
+        return self._rgba
+
+    def show(self, frame, rgb=False):
+        self.prepare(frame, rgb=rgb)
+        self.photo.paste(self._image)
@@ -0,0 +1,74 @@
+import math
+import time
+
+
+class DisplayScheduler():
+    """Paces a Tk redraw loop at a target FPS, independent of the source.
+
+    Every tick is told the sequence number of the newest frame available:
+    ``newer()`` says whether it must be drawn and keeps the counters.
+    `dropped` counts frames that were produced but never drawn, and
+    `duplicated` counts ticks that had nothing new, so the pane kept its
+    previous frame. ``delay_until()`` maps source timestamps onto the wall
+    clock, for pacing recorded files at their real speed.
+    """
+    def __init__(self, widget, fps=30.0):
+        self.widget = widget
+        self.fps = fps
+        self._job = None
+        self.reset()
+
+    @property
+    def period_ms(self):
+        return 1000.0 / self.fps
+
+    def reset(self):
+        self.rendered = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self._seq = 0
+        self._origin_ms = None
+
+    def after(self, callback, delay_ms=None):
+        """Schedule the next tick, by default one display period from now"""
+        self.cancel()
+        delay_ms = self.period_ms if delay_ms is None else delay_ms
+        self._job = self.widget.after(max(1, math.ceil(delay_ms)), callback)
+
+    def cancel(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def hold(self):
+        """Record a tick with nothing new to draw"""
+        self.duplicated += 1
+
+    def newer(self, seq):
+        """Record a tick that saw frame `seq`; True if it should be drawn"""
+        if seq <= self._seq:
+            self.hold()
+            return False
+        if self._seq:
+            self.dropped += seq - self._seq - 1
+        self._seq = seq
+        self.rendered += 1
+        return True
+
+    def delay_until(self, timestamp_ms):
+        """Milliseconds until the frame at `timestamp_ms` is due (negative if late).
+
+        The first call anchors the source clock to the wall clock.
+        """
+        now_ms = time.monotonic() * 1000.0
+        if self._origin_ms is None:
+            self._origin_ms = now_ms - timestamp_ms
+        return self._origin_ms + timestamp_ms - now_ms
+
+    @property
+    def stats(self):
+        return {
+            'rendered': self.rendered,
+            'dropped': self.dropped,
+            'duplicated': self.duplicated,
+        }
@@ -0,0 +1,244 @@
+"""Frame sources shared by the counters and the inspection GUI.
+
+Every source mirrors the parts of cv2.VideoCapture the detectors use
+(``read``, ``isOpened``, ``release``), so call sites accept either.
+Sources that can jump to a frame set ``seekable``; callers check it before
+``seek`` instead of relying on an exception.
+"""
+import abc
+import io
+import re
+import time
+import cv2
+import numpy as np
+
+
+class FrameSource(abc.ABC):
+    """Base class for anything that produces BGR frames in order"""
+    fps = 0.0
+    frame_count = 0
+    # True if seek() can position the source on any frame
+    seekable = False
+
+    @abc.abstractmethod
+    def read(self, frame=None):
+        """Return (ret, frame); `frame` may be reused as the destination"""
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def seek(self, index):
+        """Position the source so the next read returns frame `index`"""
+        raise io.UnsupportedOperation(f"{type(self).__name__} cannot seek")
+
+    def rewind(self):
+        """Go back to the first frame if the source is seekable; returns
+        whether it did"""
+        if self.seekable:
+            self.seek(0)
+        return self.seekable
+
+    @property
+    def timestamp(self):
+        """Presentation time of the last frame read, in milliseconds"""
+        return 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _CaptureSource(FrameSource):
+    def __init__(self, capture):
+        self.cap = capture
+
+    def read(self, frame=None):
+        return self.cap.read(frame)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    @property
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+
+class FileSource(_CaptureSource):
+    """Recorded video file; with `loop=True` it starts over at the end"""
+    seekable = True
+
+    def __init__(self, path, loop=False):
+        super().__init__(cv2.VideoCapture(str(path)))
+        self.path = str(path)
+        self.loop = loop
+
+    def read(self, frame=None):
+        ret, frame = self.cap.read(frame)
+        if not ret and self.loop:
+            self.rewind()
+            ret, frame = self.cap.read(frame)
+        return ret, frame
+
+    def seek(self, index):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    @property
+    def frame_count(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    @property
+    def timestamp(self):
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC)
+
+
+class CameraSource(_CaptureSource):
+    """Live camera; timestamps are wall-clock time since the camera opened"""
+    def __init__(self, index=0, width=None, height=None, fps=None):
+        super().__init__(cv2.VideoCapture(index))
+        self.index = index
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self._opened_at = time.monotonic()
+        self._timestamp = 0.0
+
+    def read(self, frame=None):
+        ret, frame = self.cap.read(frame)
+        self._timestamp = (time.monotonic() - self._opened_at) * 1000.0
+        return ret, frame
+
+    @property
+    def timestamp(self):
+        return self._timestamp
+
+
+RING = "ring"
+DOUBLE_RING = "double_ring"
+DISC = "disc"
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic conveyor of white rings on black at any resolution/FPS.
+
+    Figures cross the frame left to right in `pass_frames` frames, separated
+    by `gap_frames` empty frames. Each figure is a single ring (counted as
+    Simple), two linked rings (Double) or, if `discs=True`, a solid disc that
+    no counter should count. The kind of figure k depends only on
+    (seed, k), so every frame is a pure function of its index: runs are
+    reproducible and ``seek`` is free.
+    """
+    seekable = True
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=None, seed=0,
+                 pass_frames=8, gap_frames=24, discs=False, realtime=False):
+        self.width = width
+        self.height = height
+        self.fps = float(fps)
+        self.frames = frames
+        self.seed = seed
+        self.pass_frames = pass_frames
+        self.gap_frames = gap_frames
+        self.discs = discs
+        self.realtime = realtime
+        self.index = 0
+        self._started_at = None
+        self._radius = max(8, height // 8)
+        self._thickness = max(2, self._radius // 6)
+
+    @property
+    def frame_count(self):
+        return self.frames or 0
+
+    @property
+    def timestamp(self):
+        return max(0, self.index - 1) * 1000.0 / self.fps
+
+    def seek(self, index):
+        self.index = index
+        self._started_at = None
+
+    def figure_kind(self, k):
+        kinds = (RING, DOUBLE_RING, DISC) if self.discs else (RING, DOUBLE_RING)
+        return kinds[np.random.default_rng([self.seed, k]).integers(len(kinds))]
+
+    def expected(self, frames=None):
+        """Kinds of the figures that fully cross the frame in the first `frames` frames"""
+        frames = frames or self.frames
+        period = self.pass_frames + self.gap_frames
+        return [self.figure_kind(k) for k in range((frames - self.pass_frames) // period + 1)
+                if k * period + self.pass_frames < frames]
+
+    def draw(self, index, frame):
+        frame[...] = 0
+        period = self.pass_frames + self.gap_frames
+        k, offset = divmod(index, period)
+        if offset >= self.pass_frames:
+            return frame
+        r, t = self._radius, self._thickness
+        # Enter fully hidden on the left, leave fully hidden on the right
+        x = int(-r + (self.width + 2 * r) * (offset + 0.5) / self.pass_frames)
+        y = self.height // 2
+        kind = self.figure_kind(k)
+        if kind == DOUBLE_RING:
+            # Two overlapping discs with a hole each, like an 8: one blob, two holes
+            d = (2 * r - t) // 2
+            centers = [(x - d, y), (x + d, y)]
+        else:
+            centers = [(x, y)]
+        for center in centers:
+            cv2.circle(frame, center, r, (255, 255, 255), -1)
+        if kind != DISC:
+            for center in centers:
+                cv2.circle(frame, center, r - t, (0, 0, 0), -1)
+        return frame
+
+    def read(self, frame=None):
+        if self.frames is not None and self.index >= self.frames:
+            return False, frame
+        if frame is None or frame.shape != (self.height, self.width, 3):
+            frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        if self.realtime:
+            if self._started_at is None:
+                self._started_at = time.monotonic() - self.index / self.fps
+            delay = self._started_at + self.index / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.draw(self.index, frame)
+        self.index += 1
+        return True, frame
+
+
+_SYNTHETIC = re.compile(r"synthetic(?::(\d+)x(\d+))?(?:@([\d.]+))?(?:/(\d+))?$")
+
+
+def open_source(spec, loop=False):
+    """Build a FrameSource from a camera index, a file path or a synthetic spec.
+
+    Synthetic specs look like ``synthetic:1920x1080@120/3600`` (size, FPS
+    and frame count are all optional).
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec))
+    match = _SYNTHETIC.match(str(spec))
+    if match:
+        width, height, fps, frames = match.groups()
+        return SyntheticSource(
+            width=int(width or 640),
+            height=int(height or 480),
+            fps=float(fps or 30),
+            frames=int(frames) if frames else None,
+        )
+    return FileSource(spec, loop=loop)
@@ -0,0 +1,65 @@
+import io
+import os
+import sys
+import contextlib
+import cv2
+import numpy as np
+import pytest
+from bestframe import BestFrameSelector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "parcial"))
+inspeccion = pytest.importorskip("gui_inspeccion_corregida")
+
+
+def piece_frame(center, hole_radius=0):
+    frame = np.zeros((540, 960, 3), dtype=np.uint8)
+    cv2.circle(frame, center, 170, (0, 220, 220), -1)
+    if hole_radius:
+        cv2.circle(frame, center, hole_radius, (0, 0, 0), -1)
+    return frame
+
+
+@pytest.mark.parametrize("center", [(480, 270), (150, 270), (800, 200)])
+@pytest.mark.parametrize("hole_radius", [0, 150])
+def test_crop_classification_matches_full_frame(center, hole_radius):
+    frame = piece_frame(center, hole_radius)
+    pipeline = inspeccion.PipelineInspeccion()
+    contour = max(pipeline.deteccion.contours(frame), key=cv2.contourArea)
+    selector = BestFrameSelector(k=1, margin=pipeline.selector.margin)
+    selector.offer(frame, contour)
+    best = selector.best()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        full = inspeccion.clasificar_pieza(frame)
+        crop = inspeccion.clasificar_pieza(best.crop, origen=best.offset, tamano=frame.shape)
+    assert crop[0] == full[0]
+    assert crop[1] == full[1]
+    assert crop[3] == full[3]
+    assert np.array_equal(crop[2], full[2])
+
+
+def test_piece_touching_the_border_is_taken_when_centred():
+    # 300 px high: the piece touches the top and bottom edges on every frame
+    centers = [(x, 150) for x in range(20, 960, 60)]
+    frames = []
+    for center in centers:
+        frame = np.zeros((300, 960, 3), dtype=np.uint8)
+        cv2.circle(frame, center, 170, (0, 220, 220), -1)
+        frames.append(frame)
+    centred = min(range(len(centers)), key=lambda i: abs(centers[i][0] - 480))
+
+    selector = BestFrameSelector(k=3)
+    for seq, frame in enumerate(frames):
+        binary = cv2.threshold(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 0, 255, cv2.THRESH_BINARY)[1]
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        selector.offer(frame, max(contours, key=cv2.contourArea), seq=seq)
+    assert selector.best().seq == centred
+
+    pipeline = inspeccion.PipelineInspeccion()
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in frames + [np.zeros_like(frames[0])]:
+            resultado, _ = pipeline.procesar(frame)
+            if resultado is not None:
+                results.append(resultado)
+    assert [(tipo, detalle['frame']) for tipo, _, _, detalle in results] == [('bien fabricada', centred)]
@@ -0,0 +1,58 @@
+import threading
+import time
+import numpy as np
+import logger
+from camera import RunCamera
+from sources import FrameSource
+
+
+class HangingSource(FrameSource):
+    """Gives frames until `hang` is set, then blocks in read() until `release_read` is set"""
+    def __init__(self, hang, release_read):
+        self.hang = hang
+        self.release_read = release_read
+
+    def read(self, frame=None):
+        if self.hang.is_set():
+            self.release_read.wait()
+        time.sleep(0.01)
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_restart_waits_for_a_hung_capture_thread(tmp_path, monkeypatch):
+    # Send the camera logger to a temporary file before RunCamera creates it
+    logger.Logger('LoggerCamera', log_file=str(tmp_path / "app.log"))
+    hang, release_read = threading.Event(), threading.Event()
+    cam = RunCamera(src=HangingSource(hang, release_read), retry_delay=0.05, warmup=0.0)
+    real_join = threading.Thread.join
+
+    def short_join(thread, timeout=None):
+        # stop() waits 2 s per thread; keep the test quick
+        return real_join(thread, None if timeout is None else min(timeout, 0.1))
+    monkeypatch.setattr(threading.Thread, 'join', short_join)
+    try:
+        cam.start()
+        wait_for(lambda: cam.stats.frames > 0)
+        hang.set()
+        time.sleep(0.05)
+        old_thread = cam.my_thread
+
+        assert cam.restart() is False
+        assert cam.stats.failures >= 1
+        assert cam.my_thread is old_thread
+
+        hang.clear()
+        release_read.set()
+        wait_for(lambda: cam.my_thread is not old_thread and cam.running)
+        frames = cam.stats.frames
+        wait_for(lambda: cam.stats.frames > frames)
+    finally:
+        cam.stop()
+        logger.shutdown()
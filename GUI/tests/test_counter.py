@@ -0,0 +1,25 @@
+import os
+import pytest
+import counter
+
+VIDEO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "contornos", "camara")
+VIDEOS = ["video_1_7.avi", "video_1_12.avi"]
+
+
+def labels(report):
+    return [(event['frame'], event['label']) for event in report['events']]
+
+
+@pytest.fixture(scope="module")
+def sequential():
+    return {video: counter.count_video(os.path.join(VIDEO_DIR, video)) for video in VIDEOS}
+
+
+@pytest.mark.parametrize("video", VIDEOS)
+# 24 shards of video_1_7 are about 25 frames long, shorter than a figure
+# pass, so some shards have no exit to cut at
+@pytest.mark.parametrize("workers", [1, 2, 3, 24])
+def test_sharded_matches_sequential(sequential, video, workers):
+    report = counter.count_video_sharded(os.path.join(VIDEO_DIR, video), workers=workers)
+    assert report['totals'] == sequential[video]['totals']
+    assert labels(report) == labels(sequential[video])
@@ -0,0 +1,17 @@
+import journal
+
+
+def test_records_are_64_bytes():
+    assert journal.EVENT_DTYPE.itemsize == 64
+
+
+def test_labels_are_cut_on_a_character_boundary(tmp_path):
+    path = tmp_path / "events.evj"
+    # 15 ASCII bytes, then a 2-byte character that does not fit
+    label = "x" * 15 + "ñ"
+    with journal.EventJournal(path) as diario:
+        diario.append(1, label, color="marrón")
+    records = journal.load(path)
+    assert records['label'][0].decode('utf-8') == "x" * 15
+    assert records['color'][0].decode('utf-8') == "marrón"
+    assert journal.summary(records)['labels'] == {"x" * 15: 1}
@@ -0,0 +1,16 @@
+import time
+import logger
+
+
+def test_idle_queue_flushes_the_last_records(tmp_path):
+    log_file = tmp_path / "app.log"
+    log = logger.Logger("test_idle_flush", log_file=str(log_file), batch_size=1000, flush_interval=0.05)
+    try:
+        log.info("first")
+        log.info("last of the burst")
+        deadline = time.monotonic() + 2.0
+        while "last of the burst" not in log_file.read_text(encoding='utf-8'):
+            assert time.monotonic() < deadline, "pending records were never flushed"
+            time.sleep(0.02)
+    finally:
+        logger.shutdown()
@@ -0,0 +1,37 @@
+import io
+import pytest
+import counter
+from sources import FrameSource, SyntheticSource
+
+
+class StreamSource(FrameSource):
+    """A synthetic conveyor seen through a source that cannot seek"""
+    def __init__(self, frames):
+        self.synthetic = SyntheticSource(frames=frames)
+        self.frame_count = frames
+
+    def read(self, frame=None):
+        return self.synthetic.read(frame)
+
+
+def test_read_is_abstract():
+    with pytest.raises(TypeError):
+        FrameSource()
+
+
+def test_rewind_checks_seekable():
+    stream = StreamSource(10)
+    assert not stream.seekable
+    assert stream.rewind() is False
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(0)
+
+    synthetic = SyntheticSource(frames=10)
+    synthetic.read()
+    assert synthetic.rewind() is True
+    assert synthetic.index == 0
+
+
+def test_sharding_falls_back_for_unseekable_sources():
+    report = counter.count_video_sharded(StreamSource(400), workers=4)
+    assert report['totals'] == counter.count_video(SyntheticSource(frames=400))['totals']
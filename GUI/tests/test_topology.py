@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+import topology
+
+
+def tree_counts(binary):
+    """Nested counts of the top-level contours, in the order findContours gives them"""
+    _, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return []
+    return topology.nesting(hierarchy)[1].tolist()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_component_nesting_matches_contour_tree(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(100):
+        binary = np.where(rng.random((12, 12)) < 0.5, 255, 0).astype(np.uint8)
+        # Both sides are per object; only their order may differ
+        assert sorted(topology.component_nesting(binary).tolist()) == sorted(tree_counts(binary))
+        assert (topology.internal_contours(binary, method=topology.COMPONENTS)
+                == topology.internal_contours(binary))
+
+
+def test_nested_rings():
+    binary = np.zeros((60, 60), dtype=np.uint8)
+    for radius, value in ((25, 255), (20, 0), (12, 255), (7, 0)):
+        cv2.circle(binary, (30, 30), radius, value, -1)
+    assert topology.component_nesting(binary).tolist() == [3]
+    assert topology.internal_contours(binary) == 3
+
+
+def test_border_pixels_are_foreground():
+    binary = np.zeros((20, 20), dtype=np.uint8)
+    binary[0, 5] = 255
+    contours, _ = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    assert len(contours) == 1
+    assert topology.has_foreground(binary)
+    assert not topology.has_foreground(np.zeros((20, 20), dtype=np.uint8))
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+from tracker import Detection, FigureTracker, Track
+
+
+def ring_frame(centers, shape=(480, 640)):
+    """Binary frame with one ring per (x, y, radius)"""
+    binary = np.zeros(shape, dtype=np.uint8)
+    for x, y, radius in centers:
+        cv2.circle(binary, (x, y), radius, 255, thickness=max(3, radius // 5))
+    return binary
+
+
+def test_associate_keeps_matching_past_a_small_gate():
+    tracker = FigureTracker()
+    small = Track(1)
+    small.add(Detection((0.0, 0.0), (0, 0, 10, 10), 80.0, 1), 0)
+    big = Track(2)
+    big.add(Detection((100.0, 0.0), (0, 0, 200, 200), 30000.0, 1), 0)
+    tracker.tracks = [small, big]
+    detections = [
+        Detection((0.0, 0.0), (0, 0, 10, 10), 80.0, 1),
+        # Moved 60 px: inside the big track's gate, but the small track's
+        # rejected pair to it (40 px) sorts first
+        Detection((40.0, 0.0), (0, 0, 200, 200), 30000.0, 1),
+    ]
+    assert tracker._associate(detections) == {0: 0, 1: 1}
+
+
+def test_small_and_big_object_keep_their_tracks():
+    tracker = FigureTracker(min_area=10.0)
+    events = []
+    for x in [500, 350, 350, 350, 350, 350]:
+        # The big ring's jump lands 100 px from the small static ring, which
+        # is outside the small ring's gate but well within the big one's
+        binary = ring_frame([(250, 240, 8), (x, 240, 60)])
+        events.extend(tracker.process(None, binary))
+    assert events == []
+    assert len(tracker.tracks) == 2
@@ -0,0 +1,135 @@
+"""Presence, hole counts and per-object statistics of binary masks.
+
+Everything follows the cv2.findContours conventions the counters were
+built on: objects are 8-connected, holes 4-connected, and pixels on the
+frame border are foreground like any other. A "hole count" is the number
+of contours nested inside an object at any depth (holes, islands inside
+holes, their holes...), which is what figures.count_internal_contours has
+always counted for a whole frame.
+
+Hole counts come from one of two methods giving identical results:
+
+* CONTOURS: the findContours(RETR_TREE) hierarchy (the default).
+* COMPONENTS: connected-component labelling of the objects (8-connected)
+  and of the background (4-connected) in the foreground's bounding box,
+  with each region's parent read next to its first pixel.
+
+On the conveyor videos COMPONENTS costs about 600 us per figure frame
+against about 150 us for CONTOURS, so the counters keep CONTOURS.
+"""
+import cv2
+import numpy as np
+
+
+OBJECT_DTYPE = np.dtype([
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'),
+    ('area', '<f8'),
+    ('cx', '<f8'), ('cy', '<f8'),
+    ('holes', '<i4'),
+])
+
+CONTOURS = 'contours'
+COMPONENTS = 'components'
+
+_HAS_NON_ZERO = hasattr(cv2, 'hasNonZero')
+
+
+def has_foreground(binary):
+    """True if findContours would find any contour, without tracing one"""
+    if _HAS_NON_ZERO:
+        return cv2.hasNonZero(binary)
+    return cv2.countNonZero(binary) > 0
+
+
+def nesting(hierarchy):
+    """Top-level contour indices and the number of contours nested in each.
+
+    `hierarchy` is the array returned by findContours(RETR_TREE). Every
+    contour is walked up to its top-level ancestor with vectorized steps,
+    one per nesting level.
+    """
+    parents = hierarchy[0][:, 3]
+    top = np.arange(len(parents))
+    nested = parents != -1
+    while nested.any():
+        top[nested] = parents[top[nested]]
+        nested = parents[top] != -1
+    counts = np.bincount(top[parents != -1], minlength=len(parents))
+    roots = np.flatnonzero(parents == -1)
+    return roots, counts[roots]
+
+
+def _enclosing(labels, around, stats, skip):
+    """For every component k of `labels` but `skip`, the `around` label just
+    left of its first pixel in raster order, which is the region enclosing it"""
+    parents = np.zeros(len(stats), dtype=np.int32)
+    for k, (x, y, w) in enumerate(stats[:, :3]):
+        if k != skip:
+            first = x + int(np.argmax(labels[y, x:x + w] == k))
+            parents[k] = around[y, first - 1]
+    return parents
+
+
+def component_nesting(binary):
+    """Nested counts of the top-level objects, by connected components.
+
+    Same counts as nesting() on the RETR_TREE hierarchy, ordered by each
+    object's first pixel in raster order.
+    """
+    x, y, w, h = cv2.boundingRect(binary)
+    if not w:
+        return np.zeros(0, dtype=np.intp)
+    # The margin makes the outside one background component around everything
+    roi = cv2.copyMakeBorder(binary[y:y + h, x:x + w], 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    _, objects, object_stats_, _ = cv2.connectedComponentsWithStats(roi, connectivity=8)
+    _, holes, hole_stats, _ = cv2.connectedComponentsWithStats(cv2.bitwise_not(roi), connectivity=4)
+    outside = holes[0, 0]
+    # Label 0 of `objects` is the background: treat it as top-level
+    object_hole = _enclosing(objects, holes, object_stats_, skip=0)
+    object_hole[0] = outside
+    hole_object = _enclosing(holes, objects, hole_stats, skip=outside)
+
+    top = np.arange(len(object_hole))
+    nested = object_hole[top] != outside
+    while nested.any():
+        top[nested] = hole_object[object_hole[top[nested]]]
+        nested = object_hole[top] != outside
+    counts = np.bincount(top[1:], minlength=len(top)) - 1
+    inner_holes = np.flatnonzero(np.arange(len(hole_object)) != outside)
+    counts += np.bincount(top[hole_object[inner_holes]], minlength=len(top))
+    roots = np.flatnonzero(object_hole == outside)[1:]
+    return counts[roots]
+
+
+def internal_contours(binary, method=CONTOURS):
+    """Contours with a parent in the whole frame, None if there are no contours"""
+    if method == COMPONENTS:
+        counts = component_nesting(binary)
+        return int(counts.sum()) if len(counts) else None
+    _, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return None
+    return int(np.count_nonzero(hierarchy[0][:, 3] != -1))
+
+
+def object_stats(binary, min_area=0.0):
+    """One OBJECT_DTYPE row per top-level object of `binary`.
+
+    Bounding box, contour area, centroid and hole count come from a single
+    findContours(RETR_TREE) pass. Objects under `min_area` are left out.
+    """
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return np.zeros(0, dtype=OBJECT_DTYPE)
+    roots, holes = nesting(hierarchy)
+    stats = np.zeros(len(roots), dtype=OBJECT_DTYPE)
+    stats['holes'] = holes
+    for row, k in enumerate(roots):
+        moments = cv2.moments(contours[k])
+        x, y, w, h = cv2.boundingRect(contours[k])
+        area = moments['m00']
+        stats[row] = (x, y, w, h, area,
+                      moments['m10'] / area if area else x + w / 2.0,
+                      moments['m01'] / area if area else y + h / 2.0,
+                      holes[row])
+    return stats[stats['area'] >= min_area]
@@ -0,0 +1,192 @@
+"""Multi-object variant of the circle/ring counter.
+
+FigureCounter treats "any contour in view" as one figure, so two figures
+in view at once become a single pass. FigureTracker splits every frame into
+objects (top-level contours with their holes), follows them with a
+constant-velocity centroid tracker and classifies each track on its own
+when it leaves, using the same rule as the single-figure counter on the
+track's hole counts.
+"""
+import collections
+import numpy as np
+import figures
+import topology
+
+
+class Detection():
+    """One top-level contour of a frame and the holes inside it"""
+    def __init__(self, centroid, bbox, area, holes):
+        self.centroid = centroid
+        self.bbox = bbox
+        self.area = area
+        self.holes = holes
+
+
+def detect(binary, min_area=0.0):
+    """Detections of a binary frame; `holes` counts every nested contour like
+    figures.count_internal_contours does for the whole frame"""
+    return [
+        Detection((float(obj['cx']), float(obj['cy'])),
+                  (int(obj['x']), int(obj['y']), int(obj['w']), int(obj['h'])),
+                  float(obj['area']), int(obj['holes']))
+        for obj in topology.object_stats(binary, min_area)
+    ]
+
+
+class Track():
+    """Per-object state: the last `capacity` observations and the motion.
+
+    Exposes ``len()`` and ``internal_contours(i)`` so figures.classify_pass
+    can run on it directly.
+    """
+    def __init__(self, track_id, capacity=64, keep_detection=False):
+        self.id = track_id
+        self.history = collections.deque(maxlen=capacity)
+        self.crops = collections.deque(maxlen=capacity) if keep_detection else None
+        self.centroid = None
+        self.velocity = (0.0, 0.0)
+        self.size = 0
+        self.missed = 0
+
+    def predicted(self):
+        return (self.centroid[0] + self.velocity[0], self.centroid[1] + self.velocity[1])
+
+    def add(self, detection, frame_index, binary=None):
+        if self.centroid is not None:
+            self.velocity = (detection.centroid[0] - self.centroid[0],
+                             detection.centroid[1] - self.centroid[1])
+        self.centroid = detection.centroid
+        self.size = max(detection.bbox[2], detection.bbox[3])
+        self.missed = 0
+        self.history.append((frame_index, detection.holes, detection.centroid, detection.area))
+        if self.crops is not None:
+            x, y, w, h = detection.bbox
+            self.crops.append(binary[y:y + h, x:x + w].copy())
+
+    def __len__(self):
+        return len(self.history)
+
+    def internal_contours(self, i):
+        return self.history[i][1]
+
+
+class FigureTracker():
+    """Counts Simple/Double figures per tracked object.
+
+    Feed frames in order to ``process()``; it returns the list of events of
+    the tracks that ended on that frame (usually empty). A track ends after
+    `max_missed` frames without a matching detection; detections match the
+    nearest predicted track within `gate` times the track's size. Contours
+    smaller than `min_area` pixels are ignored as noise. Each track keeps at
+    most `buffer_capacity` observations, plus the binary crops of the object
+    with `keep_detection`, so memory per object is bounded.
+    """
+    def __init__(self, buffer_capacity=64, max_missed=0, gate=1.5, min_area=1000.0,
+                 start_index=0, keep_detection=False):
+        self.buffer_capacity = buffer_capacity
+        self.max_missed = max_missed
+        self.gate = gate
+        self.min_area = min_area
+        self.keep_detection = keep_detection
+        self.frame_index = start_index
+        self.tracks = []
+        self.next_id = 1
+        self.total_figures = 0
+        self.circles = 0
+        self.rings = 0
+        self._binary = None
+
+    @property
+    def totals(self):
+        return {
+            'total': self.total_figures,
+            figures.SIMPLE: self.circles,
+            figures.DOUBLE: self.rings,
+        }
+
+    @property
+    def figure_present(self):
+        return bool(self.tracks)
+
+    def _associate(self, detections):
+        """Greedy nearest-neighbour matching; returns {track index: detection index}"""
+        if not self.tracks or not detections:
+            return {}
+        predicted = np.array([track.predicted() for track in self.tracks])
+        centroids = np.array([detection.centroid for detection in detections])
+        distances = np.linalg.norm(predicted[:, None, :] - centroids[None, :, :], axis=2)
+        gates = np.array([self.gate * max(track.size, 1) for track in self.tracks])
+        matches = {}
+        used = set()
+        for flat in np.argsort(distances, axis=None):
+            t, d = np.unravel_index(flat, distances.shape)
+            # Gates differ per track: a pair out of one track's gate says
+            # nothing about the pairs after it
+            if distances[t, d] > gates[t] or t in matches or d in used:
+                continue
+            matches[t] = d
+            used.add(d)
+        return matches
+
+    def process(self, frame, binary=None):
+        if binary is None:
+            binary = self._binary = figures.binarize(frame, dst=self._binary)
+        detections = detect(binary, self.min_area)
+        matches = self._associate(detections)
+
+        events = []
+        alive = []
+        for t, track in enumerate(self.tracks):
+            if t in matches:
+                track.add(detections[matches[t]], self.frame_index, binary)
+                alive.append(track)
+                continue
+            track.missed += 1
+            if track.missed > self.max_missed:
+                event = self._finish(track)
+                if event is not None:
+                    events.append(event)
+            else:
+                alive.append(track)
+
+        matched = set(matches.values())
+        for d, detection in enumerate(detections):
+            if d not in matched:
+                track = Track(self.next_id, self.buffer_capacity, self.keep_detection)
+                self.next_id += 1
+                track.add(detection, self.frame_index, binary)
+                alive.append(track)
+        self.tracks = alive
+
+        self.frame_index += 1
+        return events
+
+    def _finish(self, track):
+        end = len(track)
+        result = figures.classify_pass(track, end // 2, end)
+        if result is None:
+            return None
+        label, idx, fallback = result
+        self.total_figures += 1
+        if label == figures.SIMPLE:
+            self.circles += 1
+            number = self.circles
+        else:
+            self.rings += 1
+            number = self.rings
+
+        frame_index, holes, centroid, area = track.history[idx]
+        event = {
+            'frame': frame_index,
+            'exit_frame': self.frame_index,
+            'label': label,
+            'number': number,
+            'internal_contours': holes,
+            'fallback': fallback,
+            'centroid': centroid,
+            'area': area,
+            'track': track.id,
+        }
+        if self.keep_detection:
+            event['binary'] = track.crops[idx]
+        return event
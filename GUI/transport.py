@@ -0,0 +1,258 @@
+"""Hand frames from one capture process to several analysis processes.
+
+Frames are copied once into a ``multiprocessing.shared_memory`` ring of
+fixed-shape uint8 slots; only (slot, seq, timestamp) tuples travel over the
+queues, so frame data is never pickled. Every analysis process sees every
+frame in order and hands the slot back when it is done with it; a slot is
+reused once all of them have.
+
+Usage (from the GUI directory):
+
+    python -m transport ../contornos/camara/video_1_12.avi
+    python -m transport VIDEO --pipeline counter:counter_pipeline \\
+        --pipeline gui_inspeccion_corregida:pipeline_en_proceso --path ../parcial
+"""
+import argparse
+import collections
+import importlib
+import multiprocessing as mp
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from sources import open_source
+
+
+class SharedFrameRing():
+    """`slots` uint8 frames of one fixed shape in a named shared memory block.
+
+    The process that creates the ring owns it and unlinks it on close();
+    others attach to it with ``SharedFrameRing.attach(ring.spec)``.
+    """
+    def __init__(self, shape, slots=8, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = name is None
+        size = slots * int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, slots = spec
+        return cls(shape, slots=slots, name=name)
+
+    @property
+    def spec(self):
+        """Picklable (name, shape, slots) for attaching from another process"""
+        return self.shm.name, self.shape, self.slots
+
+    def __getitem__(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        if self.frames is None:
+            return
+        # The numpy view must go before the mapping can be closed
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _consume(spec, factory, index, frames, done, results):
+    """Analysis process: run `factory()` on every frame until the None sentinel"""
+    ring = SharedFrameRing.attach(spec)
+    try:
+        pipeline = factory()
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            slot, seq, timestamp = item
+            try:
+                result = pipeline(ring[slot])
+            finally:
+                done.put(slot)
+            if result is not None:
+                results.put((index, seq, timestamp, result))
+    finally:
+        ring.close()
+
+
+class FramePublisher():
+    """Capture side: starts one process per pipeline factory and feeds them.
+
+    `factories` are picklable callables returning the per-process pipeline,
+    a callable that takes a frame and returns a result or None. With
+    `block=True` publish() waits for a free slot, which is what recorded
+    files need; with `block=False` it drops the frame instead, so a live
+    camera never waits for analysis. Results arrive as
+    (pipeline index, seq, timestamp, result) through ``poll()``.
+    """
+    def __init__(self, factories, shape, slots=8, block=True, context=None):
+        context = context or mp.get_context()
+        self.ring = SharedFrameRing(shape, slots=slots)
+        self.block = block
+        self.free = collections.deque(range(slots))
+        self.refs = np.zeros(slots, dtype=np.int32)
+        self.done = context.Queue()
+        self.results = context.Queue()
+        self.queues = []
+        self.processes = []
+        self.seq = 0
+        self.dropped = 0
+        for index, factory in enumerate(factories):
+            frames = context.Queue()
+            process = context.Process(
+                target=_consume,
+                args=(self.ring.spec, factory, index, frames, self.done, self.results),
+                name=f"analysis_{index}",
+                daemon=True,
+            )
+            process.start()
+            self.queues.append(frames)
+            self.processes.append(process)
+
+    def _reclaim(self, block):
+        """Take back released slots; with `block`, until at least one is free"""
+        while True:
+            wait = block and not self.free
+            try:
+                slot = self.done.get(timeout=0.1) if wait else self.done.get_nowait()
+            except queue.Empty:
+                if not wait:
+                    return
+                if not all(p.is_alive() for p in self.processes):
+                    raise RuntimeError("An analysis process exited while frames were pending")
+                continue
+            self.refs[slot] -= 1
+            if self.refs[slot] == 0:
+                self.free.append(slot)
+
+    def publish(self, frame, timestamp=0.0):
+        """Copy `frame` into a free slot and announce it; False if it was dropped"""
+        self._reclaim(block=False)
+        if not self.free:
+            if not self.block:
+                self.dropped += 1
+                return False
+            self._reclaim(block=True)
+        slot = self.free.popleft()
+        np.copyto(self.ring[slot], frame)
+        self.refs[slot] = len(self.queues)
+        self.seq += 1
+        for frames in self.queues:
+            frames.put((slot, self.seq, timestamp))
+        return True
+
+    def poll(self):
+        """Results that have arrived so far"""
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """Let the processes finish the queued frames; returns their last results"""
+        for frames in self.queues:
+            frames.put(None)
+        results = []
+        # Keep draining while joining: a process cannot exit with unread results
+        while any(p.is_alive() for p in self.processes):
+            results.extend(self.poll())
+            for process in self.processes:
+                process.join(timeout=0.05)
+        results.extend(self.poll())
+        self.ring.close()
+        return results
+
+
+class ProcessPipeline():
+    """RunCamera pipeline that analyzes frames in other processes.
+
+    The publisher is created on the first frame, once the frame shape is
+    known. Each call returns the results that arrived since the last one,
+    or None.
+    """
+    def __init__(self, factories, slots=8, block=False):
+        self.factories = list(factories)
+        self.slots = slots
+        self.block = block
+        self.publisher = None
+
+    def __call__(self, frame):
+        if self.publisher is None:
+            self.publisher = FramePublisher(self.factories, frame.shape, slots=self.slots, block=self.block)
+        self.publisher.publish(frame)
+        return self.publisher.poll() or None
+
+    def close(self):
+        results = []
+        if self.publisher is not None:
+            results = self.publisher.close()
+            self.publisher = None
+        return results
+
+
+def load_factory(spec):
+    """Resolve "module:function" into the function"""
+    module, _, function = spec.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", help="video file, camera index or synthetic:WxH@FPS/FRAMES")
+    parser.add_argument("--pipeline", action="append", default=None,
+                        help="module:function returning a per-frame pipeline (repeatable)")
+    parser.add_argument("--path", action="append", default=[], help="extra directory to import pipelines from")
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument("--drop", action="store_true", help="drop frames instead of waiting for a free slot")
+    args = parser.parse_args(argv)
+
+    sys.path.extend(args.path)
+    specs = args.pipeline or ["counter:counter_pipeline"]
+    factories = [load_factory(spec) for spec in specs]
+
+    cap = open_source(args.video)
+    if not cap.isOpened():
+        print(f"[ERROR] Could not open video file {args.video}", file=sys.stderr)
+        return 1
+
+    publisher = None
+    results = []
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while args.frames is None or frames < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if publisher is None:
+                publisher = FramePublisher(factories, frame.shape, slots=args.slots, block=not args.drop)
+            publisher.publish(frame, cap.timestamp)
+            results.extend(publisher.poll())
+            frames += 1
+    finally:
+        cap.release()
+        if publisher is not None:
+            results.extend(publisher.close())
+    elapsed = time.perf_counter() - start
+
+    for index, spec in enumerate(specs):
+        mine = [result for result in results if result[0] == index]
+        print(f"{spec}: {len(mine)} results")
+        for _, seq, _, result in sorted(mine, key=lambda r: r[1]):
+            print(f"  frame {seq:6d}  {result}")
+    dropped = publisher.dropped if publisher is not None else 0
+    print(f"Frames: {frames} in {elapsed:.2f} s ({frames / elapsed if elapsed > 0 else 0.0:.1f} fps), {dropped} dropped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
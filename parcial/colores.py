@@ -0,0 +1,56 @@
+import numpy as np
+
+DESCONOCIDO = 'desconocido'
+
+
+class TablaColores():
+    """Colores de referencia precompilados en una matriz (K,3) BGR.
+
+    Clasifica por el color de referencia más cercano (distancia euclidiana)
+    siempre que esté por debajo de la tolerancia; si no, 'desconocido'.
+    Con `realzar_oscuros` los colores muy oscuros (promedio < 60) se aclaran
+    antes de comparar, como hacía la versión corregida de la GUI.
+    """
+    def __init__(self, colores_ref, tolerancia, realzar_oscuros=False):
+        self.nombres = np.array(list(colores_ref) + [DESCONOCIDO])
+        self.referencias = np.array(list(colores_ref.values()), dtype=np.float64)
+        self.tolerancia = tolerancia
+        self.realzar_oscuros = realzar_oscuros
+
+    def _ajustar(self, colores):
+        if self.realzar_oscuros:
+            oscuros = colores.mean(axis=1) < 60
+            colores[oscuros] = np.minimum(255, colores[oscuros] * 1.8 + 40)
+        return colores
+
+    def clasificar_lote(self, colores):
+        """Clasifica M colores (M,3) de una vez; devuelve (nombres, distancias)"""
+        colores = np.array(colores, dtype=np.float64).reshape(-1, np.shape(colores)[-1])[:, :3]
+        colores = self._ajustar(colores)
+        distancias = np.linalg.norm(colores[:, None, :] - self.referencias[None, :, :], axis=2)
+        mejor = distancias.argmin(axis=1)
+        distancia = distancias[np.arange(len(colores)), mejor]
+        fuera = distancia >= self.tolerancia
+        mejor[fuera] = len(self.referencias)
+        distancia[fuera] = np.inf
+        return self.nombres[mejor], distancia
+
+    def clasificar(self, color):
+        """Clasifica un color BGR (los canales extra de cv2.mean se ignoran)"""
+        nombres, distancias = self.clasificar_lote([color[:3]])
+        return str(nombres[0]), float(distancias[0])
+
+    def clasificar_etiquetas(self, img, etiquetas, n_etiquetas):
+        """Color de cada pieza de una imagen de etiquetas (p. ej. connectedComponents).
+
+        Calcula el color medio de las etiquetas 1..n_etiquetas-1 con un solo
+        bincount por canal y las clasifica en lote.
+        """
+        etiquetas = etiquetas.ravel()
+        pixeles = np.bincount(etiquetas, minlength=n_etiquetas)[1:n_etiquetas]
+        canales = img.reshape(-1, img.shape[-1])
+        medias = np.stack([
+            np.bincount(etiquetas, weights=canales[:, c], minlength=n_etiquetas)[1:n_etiquetas]
+            for c in range(3)
+        ], axis=1) / np.maximum(pixeles, 1)[:, None]
+        return self.clasificar_lote(medias)
@@ -1,8 +1,21 @@
+import functools
+import os
+import queue
+import sys
+import threading
 import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+
+# Los módulos compartidos (buffer de frames, fuentes de video) viven en GUI/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "GUI"))
+from bestframe import BestFrameSelector
+from presence import PresenceDetector
+from colores import TablaColores
+from sources import open_source
+from journal import EventJournal
+from render import PaneRenderer
 
 # Colores de referencia mejorados para mejor diferenciación
 COLORES_REF = {
@@ -14,47 +27,62 @@ COLORES_REF = {
     'azul_verdoso': (42, 84, 89),  # Nuevo color detectado en la muestra
 }
 TOL_COLOR = 70  # Valor balanceado entre detección y precisión
+VIDEO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_2.mp4")
+DIARIO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "eventos.evj")
+PERIODO_UI_MS = 33  # Tk refresca a ~30 fps, independiente del análisis
+# Objetos muy oscuros se aclaran antes de comparar
+TABLA_COLORES = TablaColores(COLORES_REF, TOL_COLOR, realzar_oscuros=True)
+
+@functools.lru_cache(maxsize=None)
+def tabla_mejora(contraste=1.5, brillo=30):
+    """LUT de 256 valores equivalente a clip(x * contraste + brillo, 0, 255)"""
+    tabla = np.clip(np.arange(256, dtype=np.float32) * contraste + brillo, 0, 255).astype(np.uint8)
+    tabla.flags.writeable = False
+    return tabla
 
-def mejorar_imagen_para_deteccion(frame):
+def mejorar_imagen_para_deteccion(frame, dst=None, contraste=1.5, brillo=30):
     """Mejora la imagen aumentando brillo y contraste para mejor detección"""
-    # Convertir a float para evitar overflow
-    frame_float = frame.astype(np.float32)
-    
-    # Aumentar brillo (+30) y contraste (x1.5)
-    frame_mejorado = frame_float * 1.5 + 30
-    
-    # Asegurar que los valores estén en rango 0-255
-    frame_mejorado = np.clip(frame_mejorado, 0, 255).astype(np.uint8)
-    
-    return frame_mejorado
+    # Una sola pasada por tabla (LUT) calculada una vez por configuración
+    return cv2.LUT(frame, tabla_mejora(contraste, brillo), dst=dst)
 
 def detectar_color_pieza(img, mask):
     """Detecta el color de una pieza con mejor manejo de objetos oscuros"""
     mean_color = cv2.mean(img, mask=mask)[:3]
-    mejor_coincidencia = 'desconocido'
-    menor_distancia = float('inf')
-    
-    # Aumentar el brillo para objetos muy oscuros antes de comparar
-    if np.mean(mean_color) < 60:  # Si es muy oscuro
-        mean_color = tuple(min(255, c * 1.8 + 40) for c in mean_color)  # Aumentar brillo
-        print(f"Color oscuro ajustado: {mean_color}")
-    
-    for nombre, ref in COLORES_REF.items():
-        distancia = np.linalg.norm(np.array(mean_color) - np.array(ref))
-        if distancia < TOL_COLOR and distancia < menor_distancia:
-            menor_distancia = distancia
-            mejor_coincidencia = nombre
-    
-    print(f"Color detectado: {mejor_coincidencia}, distancia: {menor_distancia:.2f}, color promedio: {mean_color}")
-    return mejor_coincidencia
+    return TABLA_COLORES.clasificar(mean_color)[0]
 
-def clasificar_pieza(frame):
-    """Clasificación con imagen mejorada para mejor detección"""
-    # Mejorar la imagen antes del análisis
-    frame_mejorado = mejorar_imagen_para_deteccion(frame)
-    
-    # Conversión a escala de grises de la imagen mejorada
-    gray = cv2.cvtColor(frame_mejorado, cv2.COLOR_BGR2GRAY)
+RADIO_CENTRO = 135  # Aumentado 200%: de 45 a 135 píxeles
+MARGEN_CONTORNO = 16  # Cierre y dilatación de clasificar_pieza, más el error de la reducción
+
+class _MascarasROI():
+    """Tres máscaras reutilizables (pieza, centro, cuerpo) del tamaño del ROI"""
+    def __init__(self):
+        self._buffer = np.zeros((3, 0, 0), dtype=np.uint8)
+
+    def obtener(self, alto, ancho):
+        if alto > self._buffer.shape[1] or ancho > self._buffer.shape[2]:
+            self._buffer = np.zeros((3, max(alto, self._buffer.shape[1]),
+                                     max(ancho, self._buffer.shape[2])), dtype=np.uint8)
+        vistas = self._buffer[:, :alto, :ancho]
+        vistas[...] = 0
+        return vistas[0], vistas[1], vistas[2]
+
+_MASCARAS_ROI = _MascarasROI()
+
+def clasificar_pieza(frame, gray=None, origen=(0, 0), tamano=None):
+    """Clasificación con imagen mejorada para mejor detección.
+
+    `gray` es la escala de grises de la imagen mejorada si ya se calculó al
+    detectar la pieza; si no, se calcula aquí. `frame` puede ser un recorte
+    de un frame de `tamano` (alto, ancho) cuya esquina está en `origen`
+    (x, y): el contorno y el centro devueltos quedan en coordenadas del
+    frame completo, y el círculo central se recorta contra el frame y no
+    contra el recorte.
+    """
+    ox, oy = origen
+    alto, ancho = frame.shape[:2] if tamano is None else tamano[:2]
+    if gray is None:
+        # Mejorar la imagen antes del análisis y pasar a escala de grises
+        gray = cv2.cvtColor(mejorar_imagen_para_deteccion(frame), cv2.COLOR_BGR2GRAY)
     
     # Umbralización con valor más bajo para capturar objetos oscuros
     _, binary = cv2.threshold(gray, 40, 255, cv2.THRESH_BINARY)
@@ -65,7 +93,7 @@ def clasificar_pieza(frame):
     binary = cv2.dilate(binary, kernel, iterations=2)
     binary = cv2.erode(binary, kernel, iterations=1)
     
-    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(ox, oy))
     print(f"Contornos encontrados: {len(contours)}")
     
     if not contours:
@@ -82,33 +110,41 @@ def clasificar_pieza(frame):
     area = cv2.contourArea(main_contour)
     print(f"Área del contorno principal: {area}")
     
-    # Crear máscara
-    mask = np.zeros_like(gray)
-    cv2.drawContours(mask, [main_contour], -1, 255, -1)
-    
     # Obtener centro
     M = cv2.moments(main_contour)
     if M["m00"] != 0:
         cx = int(M["m10"] / M["m00"])
         cy = int(M["m01"] / M["m00"])
     else:
-        cx, cy = frame.shape[1] // 2, frame.shape[0] // 2
+        cx, cy = ancho // 2, alto // 2
+    
+    # Todo el trabajo de máscaras se limita al rectángulo que cubre la pieza
+    # y el círculo central (el círculo puede salirse del contorno)
+    x, y, w, h = cv2.boundingRect(main_contour)
+    x0 = max(ox, min(x, cx - RADIO_CENTRO))
+    y0 = max(oy, min(y, cy - RADIO_CENTRO))
+    x1 = min(ox + frame.shape[1], max(x + w, cx + RADIO_CENTRO + 1))
+    y1 = min(oy + frame.shape[0], max(y + h, cy + RADIO_CENTRO + 1))
+    roi = frame[y0 - oy:y1 - oy, x0 - ox:x1 - ox]
+    mask, centro_mask, cuerpo_mask = _MASCARAS_ROI.obtener(y1 - y0, x1 - x0)
+    
+    # Crear máscara
+    cv2.drawContours(mask, [main_contour], -1, 255, -1, offset=(-x0, -y0))
     
     # Detectar color en el frame ORIGINAL (no mejorado para mantener colores reales)
-    color = detectar_color_pieza(frame, mask)
+    color = detectar_color_pieza(roi, mask)
     
     # Verificar centro negro (perforada) - también en frame original
-    centro_mask = np.zeros_like(gray)
-    cv2.circle(centro_mask, (cx, cy), 135, 255, -1)  # Aumentado 200%: de 45 a 135 píxeles
-    centro_color = cv2.mean(frame, mask=centro_mask)[:3]
+    cv2.circle(centro_mask, (cx - x0, cy - y0), RADIO_CENTRO, 255, -1)
+    centro_color = cv2.mean(roi, mask=centro_mask)[:3]
     
     # Detección inteligente de piezas perforadas
     es_centro_negro = np.all(np.array(centro_color) < 55)  # Umbral permisivo
     
     # Verificación adicional: si es oscuro, verificar si realmente tiene color
     if es_centro_negro:
-        # Verificar si se puede detectar un color conocido en el centro
-        color_centro = detectar_color_pieza(frame, centro_mask)
+        # Verificar si se puede detectar un color conocido en el centro (mismo promedio ya calculado)
+        color_centro = TABLA_COLORES.clasificar(centro_color)[0]
         if color_centro != 'desconocido':
             # Si detectamos un color conocido Y el promedio no es extremadamente bajo, no es perforada
             promedio_centro = np.mean(centro_color)
@@ -121,9 +157,10 @@ def clasificar_pieza(frame):
         return 'perforada', color, main_contour, (cx, cy)
     
     # Verificar uniformidad centro vs cuerpo en frame original
-    cuerpo_mask = cv2.bitwise_and(mask, cv2.bitwise_not(centro_mask))
+    cv2.bitwise_not(centro_mask, dst=cuerpo_mask)
+    cv2.bitwise_and(mask, cuerpo_mask, dst=cuerpo_mask)
     if cv2.countNonZero(cuerpo_mask) > 0:
-        cuerpo_color = cv2.mean(frame, mask=cuerpo_mask)[:3]
+        cuerpo_color = cv2.mean(roi, mask=cuerpo_mask)[:3]
         diferencia = np.linalg.norm(np.array(centro_color) - np.array(cuerpo_color))
         print(f"Centro: {centro_color}, Cuerpo: {cuerpo_color}, Diferencia: {diferencia}")
         
@@ -134,8 +171,220 @@ def clasificar_pieza(frame):
     
     return 'mal fabricada', color, main_contour, (cx, cy)
 
+class PipelineInspeccion():
+    """Detección y clasificación de piezas frame a frame, sin nada de Tk.
+
+    De cada pasada solo se guardan los `candidatos` mejores recortes según
+    BestFrameSelector (pieza completa, centrada y nítida), y la pieza se
+    clasifica apenas pasa por el centro, sin esperar a que salga.
+
+    La presencia y el contorno de la pieza salen de una copia del frame
+    reducida `escala` veces; el análisis a resolución completa (umbral,
+    contornos y color) solo corre sobre el recorte que se clasifica.
+    """
+    def __init__(self, candidatos=3, escala=4):
+        self.figure_present = False
+        self.clasificada = False
+        self.indice_frame = 0
+        self.inicio_pieza = 0
+        # El margen deja entrar en el recorte el círculo central completo y lo
+        # que el contorno a resolución completa crece respecto del reducido
+        self.selector = BestFrameSelector(k=candidatos, margin=RADIO_CENTRO + MARGEN_CONTORNO)
+        self.tamano_frame = None
+        # Mismo realce, umbral y área mínima que clasificar_pieza, sobre el frame reducido
+        self.deteccion = PresenceDetector(
+            escala, threshold=40, min_area=5000,
+            preprocess=lambda pequeno: mejorar_imagen_para_deteccion(pequeno, dst=pequeno),
+        )
+
+    def procesar(self, frame):
+        """Procesa un frame y devuelve (resultado, fin_de_pieza).
+
+        `resultado` es (tipo, color, frame_resultado, detalle) cuando una pieza
+        se pudo clasificar, con `detalle` = {'frame', 'centro', 'area'} para el
+        diario de eventos; `fin_de_pieza` indica que en este frame terminó una
+        pieza (entonces no se muestra como video en vivo).
+        """
+        indice = self.indice_frame
+        self.indice_frame += 1
+        self.tamano_frame = frame.shape[:2]
+        contours_validos = self.deteccion.contours(frame)
+        has_figure = len(contours_validos) > 0
+        
+        if has_figure and not self.figure_present:
+            self.figure_present = True
+            self.clasificada = False
+            self.inicio_pieza = indice
+            self.selector.reset()
+            print(f"Figura detectada, empezando en frame {indice}")
+        
+        if has_figure:
+            main_contour = max(contours_validos, key=cv2.contourArea)
+            centrada = self.selector.offer(frame, main_contour, seq=indice)
+            if centrada and not self.clasificada:
+                # La pieza ya pasó por el centro: el mejor recorte no va a mejorar mucho
+                self.clasificada = True
+                print(f"Pieza centrada, clasificando en frame {indice}")
+                return self.clasificar_mejor(), False
+            return None, False
+            
+        if self.figure_present:
+            self.figure_present = False
+            print(f"Figura terminada en frame {indice}")
+            resultado_final = None if self.clasificada else self.clasificar_mejor()
+            self.selector.reset()
+            return resultado_final, True
+        
+        return None, False
+
+    def clasificar_mejor(self):
+        """Clasifica el mejor recorte de la pasada; None si no hay pieza válida"""
+        mejor = self.selector.best()
+        if mejor is None:
+            return None
+        alto, ancho = self.tamano_frame
+        resultado = clasificar_pieza(mejor.crop, mejor.plane, origen=mejor.offset, tamano=(alto, ancho))
+        
+        # Verificar que la clasificación fue exitosa
+        if resultado[0] is None:
+            print("No se pudo clasificar la pieza, frame sin objeto válido")
+            return None
+        tipo, color, main_contour, centro = resultado
+        
+        # Crear imagen de resultado con las detecciones; se muestra el recorte,
+        # así que lo que está en coordenadas del frame se corre por su origen
+        x0, y0 = mejor.offset
+        frame_resultado = mejor.crop.copy()
+        if main_contour is not None:
+            cv2.drawContours(frame_resultado, [main_contour], -1, (0,255,0), 3, offset=(-x0, -y0))
+        if centro is not None:
+            centro_recorte = (centro[0] - x0, centro[1] - y0)
+            cv2.circle(frame_resultado, centro_recorte, 137, (0,0,255), 2)  # Círculo de visualización actualizado a 137
+            cv2.circle(frame_resultado, centro_recorte, 3, (255,255,255), -1)
+        
+        # Mostrar información en el frame
+        cv2.putText(frame_resultado, f"Tipo: {tipo}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
+        cv2.putText(frame_resultado, f"Color: {color}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
+        
+        detalle = {
+            'frame': mejor.seq,
+            'centro': centro,
+            'area': cv2.contourArea(main_contour) if main_contour is not None else None,
+        }
+        return tipo, color, frame_resultado, detalle
+
+def pipeline_en_proceso(candidatos=3):
+    """Pipeline para los procesos de análisis de GUI/transport.py.
+
+    Devuelve una función frame -> (tipo, color, detalle) o None; la imagen
+    de resultado se queda en el proceso de análisis.
+    """
+    pipeline = PipelineInspeccion(candidatos=candidatos)
+
+    def procesar(frame):
+        resultado, _ = pipeline.procesar(frame)
+        if resultado is None:
+            return None
+        tipo, color, _, detalle = resultado
+        return tipo, color, detalle
+    return procesar
+
+def miniatura_rgb(frame, tamano):
+    """Redimensiona y pasa a RGB, listo para un PaneRenderer"""
+    pequeno = cv2.resize(frame, tamano, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(pequeno, cv2.COLOR_BGR2RGB)
+
+class TrabajadorInspeccion(threading.Thread):
+    """Hilo que lee el video, corre el pipeline y deja en colas lo que Tk debe mostrar.
+
+    `cola_vivo` guarda solo las últimas miniaturas del video (si Tk se atrasa se
+    descarta la más vieja); `cola_resultados` guarda las piezas clasificadas y
+    nunca descarta: si se llena, el trabajador espera. Con un `diario`
+    (EventJournal) cada pieza queda registrada desde este mismo hilo.
+
+    El hilo es dueño de `cap` y del diario: los libera él mismo al terminar,
+    así nadie los cierra mientras está dentro de un read().
+    """
+    def __init__(self, cap, pipeline, tam_vivo=(400, 300), tam_tipo=(300, 200),
+                 max_vivo=2, max_resultados=32, diario=None):
+        super().__init__(name="TrabajadorInspeccion", daemon=True)
+        self.cap = cap
+        self.pipeline = pipeline
+        self.tam_vivo = tam_vivo
+        self.tam_tipo = tam_tipo
+        self.cola_vivo = queue.Queue(maxsize=max_vivo)
+        self.cola_resultados = queue.Queue(maxsize=max_resultados)
+        self.diario = diario
+        self.detenido = threading.Event()
+
+    def run(self):
+        try:
+            self._inspeccionar()
+        finally:
+            self._liberar()
+
+    def _liberar(self):
+        self.cap.release()
+        if self.diario is not None:
+            self.diario.close()
+
+    def _inspeccionar(self):
+        while not self.detenido.is_set():
+            # Las fuentes de archivo se abren con loop=True y vuelven solas al inicio
+            ret, frame = self.cap.read()
+            if not ret:
+                self.detenido.wait(0.1)
+                continue
+            
+            resultado, fin_de_pieza = self.pipeline.procesar(frame)
+            if resultado is not None:
+                tipo, color, frame_resultado, detalle = resultado
+                if self.diario is not None:
+                    self.diario.append(
+                        detalle['frame'], tipo,
+                        timestamp=self.cap.timestamp,
+                        color=color,
+                        centroid=detalle['centro'],
+                        area=detalle['area'],
+                    )
+                self._poner_resultado((tipo, color, miniatura_rgb(frame_resultado, self.tam_tipo)))
+            elif not fin_de_pieza:
+                self._poner_vivo(miniatura_rgb(frame, self.tam_vivo))
+
+    def _poner_vivo(self, miniatura):
+        try:
+            self.cola_vivo.put_nowait(miniatura)
+        except queue.Full:
+            try:
+                self.cola_vivo.get_nowait()
+            except queue.Empty:
+                pass
+            self.cola_vivo.put_nowait(miniatura)
+
+    def _poner_resultado(self, resultado):
+        while not self.detenido.is_set():
+            try:
+                self.cola_resultados.put(resultado, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def detener(self):
+        self.detenido.set()
+        if self.ident is None:
+            # Nunca arrancó: nadie más va a liberar la captura y el diario
+            self._liberar()
+        else:
+            # Si el join vence, el hilo los libera cuando salga del read()
+            self.join(timeout=2)
+
 class InspeccionGUI(tk.Frame):
-    def __init__(self, master=None, video_path=None):
+    def __init__(self, master=None, video_path=None, candidatos=3,
+                 diario_path=DIARIO_POR_DEFECTO):
+        """`video_path` puede ser un archivo, un índice de cámara, una
+        especificación "synthetic:..." o directamente un FrameSource.
+        Las piezas detectadas se agregan al diario binario `diario_path`
+        (None para no guardarlas)."""
         super().__init__(master)
         self.master = master
         self.master.title("Inspección de Bloques Reciclables - Con Mejora de Imagen")
@@ -143,10 +392,10 @@ class InspeccionGUI(tk.Frame):
         self.pack(fill=tk.BOTH, expand=True)
         
         if video_path is None:
-            video_path = "/home/anime/Desktop/visionArtificial/parcial/video_2.mp4"
+            video_path = VIDEO_POR_DEFECTO
         
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(self.video_path)
+        self.cap = open_source(self.video_path, loop=True)
         
         if not self.cap.isOpened():
             print(f"ERROR: No se pudo abrir el video {self.video_path}")
@@ -158,13 +407,15 @@ class InspeccionGUI(tk.Frame):
         self.mal_fabricadas = 0
         self.total = 0
         
-        # Variables para detección
-        self.figure_present = False
-        self.start_frame = 0
-        self.frames_buffer = []
+        # La captura y el análisis corren en un hilo aparte; Tk solo drena colas
+        self.pipeline = PipelineInspeccion(candidatos=candidatos)
+        diario = EventJournal(diario_path) if diario_path else None
+        self.trabajador = TrabajadorInspeccion(self.cap, self.pipeline, diario=diario)
         
         self.create_widgets()
-        self.update_video()
+        self.master.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.trabajador.start()
+        self.drenar_colas()
 
     def create_widgets(self):
         # Frame principal para el video
@@ -255,119 +506,71 @@ class InspeccionGUI(tk.Frame):
         
         self.label_porcentajes = tk.Label(self.frame_total, text="", font=("Arial", 10), bg="lightyellow")
         self.label_porcentajes.pack(pady=10)
-
-    def update_video(self):
-        if not self.cap.isOpened():
-            return
-            
-        ret, frame = self.cap.read()
-        if not ret:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            self.after(1, self.update_video)  # Ya está en 1
-            return
-        
-        # Usar imagen mejorada para detección
-        frame_mejorado = mejorar_imagen_para_deteccion(frame)
-        gray = cv2.cvtColor(frame_mejorado, cv2.COLOR_BGR2GRAY)
-        _, binary = cv2.threshold(gray, 40, 255, cv2.THRESH_BINARY)
-        
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        # Filtrar contornos por área mínima para evitar ruido
-        contours_validos = [c for c in contours if cv2.contourArea(c) > 5000]
-        has_figure = len(contours_validos) > 0
-        
-        self.frames_buffer.append(frame.copy())  # Guardar frame original
-        
-        if has_figure and not self.figure_present:
-            self.figure_present = True
-            self.start_frame = len(self.frames_buffer)
-            print(f"Figura detectada, empezando en frame {self.start_frame}")
-            
-        elif not has_figure and self.figure_present:
-            self.figure_present = False
-            end_frame = len(self.frames_buffer)
-            mid_frame_idx = (self.start_frame + end_frame) // 2
-            
-            print(f"Figura terminada, analizando frame medio {mid_frame_idx}")
-            
-            if mid_frame_idx < len(self.frames_buffer):
-                test_frame = self.frames_buffer[mid_frame_idx]
-                resultado = clasificar_pieza(test_frame)
-                
-                # Verificar que la clasificación fue exitosa
-                if resultado[0] is not None:
-                    tipo, color, main_contour, centro = resultado
-                    
-                    # Actualizar contadores
-                    self.total += 1
-                    if tipo == 'bien fabricada':
-                        self.bien_fabricadas += 1
-                    elif tipo == 'perforada':
-                        self.perforadas += 1
-                    else:
-                        self.mal_fabricadas += 1
-                    
-                    # Crear imagen de resultado con las detecciones
-                    frame_resultado = test_frame.copy()
-                    if main_contour is not None:
-                        cv2.drawContours(frame_resultado, [main_contour], -1, (0,255,0), 3)
-                    if centro is not None:
-                        cv2.circle(frame_resultado, centro, 137, (0,0,255), 2)  # Círculo de visualización actualizado a 137
-                        cv2.circle(frame_resultado, centro, 3, (255,255,255), -1)
-                    
-                    # Mostrar información en el frame
-                    cv2.putText(frame_resultado, f"Tipo: {tipo}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
-                    cv2.putText(frame_resultado, f"Color: {color}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
-                    
-                    print(f"Detectada pieza {self.total}: {tipo} - Color: {color}")
-                    
-                    # Actualizar GUI con el frame de detección
-                    self.actualizar_pantallas(tipo, color, frame_resultado)
-                else:
-                    print("No se pudo clasificar la pieza, frame sin objeto válido")
-            
-            # Limpiar buffer
-            self.frames_buffer = []
-        else:
-            # Mostrar frame actual solo si no estamos mostrando una detección
-            self.mostrar_frame(frame)
-        
-        # Continuar actualizando más rápido
-        self.after(1, self.update_video)  # Ya está en 1
-
-    def mostrar_frame(self, frame):
-        """Muestra el frame actual en la GUI"""
-        resultado_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(resultado_rgb)
-        # Redimensionar para que quepa en la GUI
-        img = img.resize((400, 300), Image.Resampling.LANCZOS)  # Más pequeño para dar espacio
-        imgtk = ImageTk.PhotoImage(image=img)
-        self.label_frame.imgtk = imgtk
-        self.label_frame.configure(image=imgtk)
-
-    def mostrar_frame_en_pantalla_tipo(self, frame_resultado, tipo):
-        """Muestra el frame en la pantalla correspondiente al tipo detectado"""
-        resultado_rgb = cv2.cvtColor(frame_resultado, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(resultado_rgb)
-        # Redimensionar para las pantallas de tipo en layout vertical (más grandes)
-        img = img.resize((300, 200), Image.Resampling.LANCZOS)
-        imgtk = ImageTk.PhotoImage(image=img)
         
+        # Un PhotoImage persistente por pantalla, actualizado en su lugar
+        self.render_vivo = PaneRenderer(self.label_frame, size=self.trabajador.tam_vivo)
+        self.render_tipos = {
+            'bien fabricada': PaneRenderer(self.label_bien_frame, size=self.trabajador.tam_tipo),
+            'perforada': PaneRenderer(self.label_perforada_frame, size=self.trabajador.tam_tipo),
+            'mal fabricada': PaneRenderer(self.label_mal_frame, size=self.trabajador.tam_tipo),
+        }
+
+    def drenar_colas(self):
+        """Muestra lo que dejó el trabajador, al ritmo de la pantalla"""
+        while True:
+            try:
+                tipo, color, miniatura = self.trabajador.cola_resultados.get_nowait()
+            except queue.Empty:
+                break
+            self.registrar_resultado(tipo, color, miniatura)
+        
+        # Del video en vivo solo interesa la miniatura más reciente
+        miniatura = None
+        while True:
+            try:
+                miniatura = self.trabajador.cola_vivo.get_nowait()
+            except queue.Empty:
+                break
+        if miniatura is not None:
+            self.mostrar_frame(miniatura)
+        
+        self.after(PERIODO_UI_MS, self.drenar_colas)
+
+    def registrar_resultado(self, tipo, color, miniatura):
+        # Actualizar contadores
+        self.total += 1
         if tipo == 'bien fabricada':
-            self.label_bien_frame.imgtk = imgtk
-            self.label_bien_frame.configure(image=imgtk)
+            self.bien_fabricadas += 1
         elif tipo == 'perforada':
-            self.label_perforada_frame.imgtk = imgtk
-            self.label_perforada_frame.configure(image=imgtk)
-        else:  # mal fabricada
-            self.label_mal_frame.imgtk = imgtk
-            self.label_mal_frame.configure(image=imgtk)
+            self.perforadas += 1
+        else:
+            self.mal_fabricadas += 1
+        
+        print(f"Detectada pieza {self.total}: {tipo} - Color: {color}")
+        
+        # Actualizar GUI con el frame de detección
+        self.actualizar_pantallas(tipo, color, miniatura)
+
+    def cerrar(self):
+        # La captura la libera el trabajador al terminar
+        self.trabajador.detener()
+        self.master.destroy()
+
+    def mostrar_frame(self, miniatura):
+        """Muestra la miniatura RGB (400x300) del frame actual en la GUI"""
+        self.render_vivo.show(miniatura, rgb=True)
+
+    def mostrar_frame_en_pantalla_tipo(self, miniatura, tipo):
+        """Muestra la miniatura RGB (300x200) en la pantalla correspondiente al tipo detectado"""
+        # Cualquier otro tipo va a la pantalla de mal fabricada
+        renderer = self.render_tipos.get(tipo, self.render_tipos['mal fabricada'])
+        renderer.show(miniatura, rgb=True)
 
-    def actualizar_pantallas(self, tipo, color, frame_resultado):
+    def actualizar_pantallas(self, tipo, color, miniatura):
         """Actualiza las pantallas con la información detectada"""
         
         # Mostrar el frame en la pantalla correspondiente al tipo
-        self.mostrar_frame_en_pantalla_tipo(frame_resultado, tipo)
+        self.mostrar_frame_en_pantalla_tipo(miniatura, tipo)
         
         # Pantalla 1: Contadores actualizados
         self.label_bien.configure(text=f"Bien fabricadas:\n{self.bien_fabricadas}")
@@ -388,7 +591,7 @@ class InspeccionGUI(tk.Frame):
 
 if __name__ == "__main__":
     root = tk.Tk()
-    # Usar ruta absoluta para asegurar que encuentra el video
-    video_path = "/home/anime/Desktop/visionArtificial/parcial/video_2.mp4"
+    # Video como argumento (archivo, cámara o "synthetic:..."); por defecto el de esta carpeta
+    video_path = sys.argv[1] if len(sys.argv) > 1 else VIDEO_POR_DEFECTO
     app = InspeccionGUI(master=root, video_path=video_path)
     app.mainloop()
@@ -1,5 +1,11 @@
+import os
+import sys
 import cv2
 import numpy as np
+from colores import TablaColores
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "GUI"))
+from sources import open_source
 
 # --- CLASIFICACIÓN DE PIEZAS ---
 # 1. bien fabricada: color correcto, agujero presente
@@ -17,14 +23,12 @@ COLORES_REF = {
 
 # Tolerancia para color
 TOL_COLOR = 60
+TABLA_COLORES = TablaColores(COLORES_REF, TOL_COLOR)
 
-# Detecta el color dominante de la pieza
+# Detecta el color dominante de la pieza (referencia más cercana dentro de la tolerancia)
 def detectar_color_pieza(img, mask):
     mean_color = cv2.mean(img, mask=mask)[:3]
-    for nombre, ref in COLORES_REF.items():
-        if np.linalg.norm(np.array(mean_color) - np.array(ref)) < TOL_COLOR:
-            return nombre
-    return 'desconocido'
+    return TABLA_COLORES.clasificar(mean_color)[0]
 
 # Detecta si hay agujero (perforación) en el centro
 def detectar_perforacion(img, main_contour):
@@ -61,7 +65,7 @@ def clasificar_pieza(img):
 
 # Procesa el video y cuenta cada tipo de pieza
 def inspeccionar_video(video_path):
-    cap = cv2.VideoCapture(video_path)
+    cap = open_source(video_path)
     bien_fabricadas = 0
     sin_perforar = 0
     mal_fabricadas = 0
@@ -103,4 +107,5 @@ def inspeccionar_video(video_path):
 
 # Ejemplo de uso
 if __name__ == "__main__":
-    inspeccionar_video("video_2.mp4")
+    video_por_defecto = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_2.mp4")
+    inspeccionar_video(sys.argv[1] if len(sys.argv) > 1 else video_por_defecto)
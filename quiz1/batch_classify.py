@@ -0,0 +1,149 @@
+"""Classify many images into levels at once.
+
+The level rule is the one SimpleImageClassifier uses, a brightness ladder,
+but its cut points come from the calibrated ranges (level_ranges.json or
+the output of analyze_all_levels) instead of being written in the code,
+and it runs on all the images at once with np.searchsorted.
+
+Usage:
+
+    python batch_classify.py intake/                 # every .bmp in a directory
+    python batch_classify.py "intake/**/*.bmp" --csv levels.csv
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import sys
+from pathlib import Path
+import cv2
+import numpy as np
+from features import FeatureCache, grays_features, iter_features
+
+RANGES_PATH = Path(__file__).resolve().parent / "level_ranges.json"
+# level_ranges.json names the brightness feature differently than
+# SimpleImageClassifier.analyze_all_levels
+RANGES_FEATURE = 'mean_brightness'
+
+
+def load_ranges(path=RANGES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def level_thresholds(ranges, feature=RANGES_FEATURE):
+    """(levels, thresholds) of the brightness ladder.
+
+    Levels are ordered by their mean `feature`; each threshold sits halfway
+    between the top of one level's range and the bottom of the next, so
+    level i covers thresholds[i-1] <= value < thresholds[i]. Raises
+    ValueError when overlapping ranges give thresholds that do not increase,
+    since np.searchsorted would then assign wrong levels without notice.
+    """
+    levels = sorted(ranges, key=lambda level: ranges[level][feature]['mean'])
+    thresholds = np.array([
+        (ranges[lower][feature]['max'] + ranges[upper][feature]['min']) / 2.0
+        for lower, upper in zip(levels, levels[1:])
+    ])
+    unordered = np.flatnonzero(np.diff(thresholds) <= 0)
+    if len(unordered):
+        i = unordered[0]
+        raise ValueError(
+            f"{feature} ranges overlap too much for a ladder: the {levels[i]}/{levels[i + 1]} "
+            f"cut ({thresholds[i]:.2f}) is not below the {levels[i + 1]}/{levels[i + 2]} "
+            f"cut ({thresholds[i + 1]:.2f})"
+        )
+    return np.array(levels), thresholds
+
+
+def assign_levels(values, levels, thresholds):
+    """Level of every value, in one vectorized lookup"""
+    return levels[np.searchsorted(thresholds, values, side='right')]
+
+
+def _image_paths(source):
+    """Sorted image paths of a directory (its .bmp files) or a glob pattern"""
+    if os.path.isdir(source):
+        return sorted(str(path) for path in Path(source).glob("*.bmp"))
+    return sorted(glob.glob(str(source), recursive=True))
+
+
+def _iter_array_features(images, batch_size=4096):
+    """Yield (index, features) for an iterable of BGR or grayscale arrays,
+    `batch_size` images at a time through grays_features()"""
+    images = iter(images)
+    start = 0
+    while True:
+        batch = [img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                 for img in itertools.islice(images, batch_size)]
+        if not batch:
+            break
+        for i, features in enumerate(grays_features(batch), start):
+            yield str(i), features
+        start += len(batch)
+
+
+def batch_features(source, workers=None, cache=None):
+    """(names, brightness) of a directory, a glob pattern or an iterable of
+    images (BGR or grayscale arrays); unreadable images are left out"""
+    names = []
+    values = []
+    if isinstance(source, (str, os.PathLike)):
+        results = iter_features(_image_paths(source), workers=workers, cache=cache)
+    else:
+        results = _iter_array_features(source)
+    for name, features in results:
+        if features:
+            names.append(name)
+            values.append(features['brightness'])
+    return np.array(names, dtype=str), np.array(values, dtype=np.float64)
+
+
+def classify_batch(source, ranges=None, feature=RANGES_FEATURE, workers=None, cache=None):
+    """Levels of every image of `source` (see batch_features).
+
+    Returns a record array with `name`, `brightness` and `level` fields.
+    `ranges` defaults to level_ranges.json.
+    """
+    if ranges is None:
+        ranges = load_ranges()
+    levels, thresholds = level_thresholds(ranges, feature)
+    names, values = batch_features(source, workers=workers, cache=cache)
+    labels = assign_levels(values, levels, thresholds)
+    return np.rec.fromarrays([names, values, labels], names='name,brightness,level')
+
+
+def write_csv(result, out):
+    writer = csv.writer(out)
+    writer.writerow(['name', 'brightness', 'level'])
+    for name, brightness, level in result:
+        writer.writerow([name, f"{brightness:.3f}", level])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of .bmp images or glob pattern")
+    parser.add_argument("--ranges", default=RANGES_PATH, help="calibrated ranges (level_ranges.json)")
+    parser.add_argument("--csv", help="write the results here instead of stdout")
+    parser.add_argument("--workers", type=int, help="feature extraction processes (default: one per core)")
+    parser.add_argument("--cache", help="feature cache file, reused between runs")
+    args = parser.parse_args(argv)
+
+    cache = FeatureCache(args.cache) if args.cache else None
+    result = classify_batch(args.source, ranges=load_ranges(args.ranges), workers=args.workers, cache=cache)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as out:
+            write_csv(result, out)
+    else:
+        write_csv(result, sys.stdout)
+
+    levels, counts = np.unique(result.level, return_counts=True)
+    summary = ", ".join(f"{level}: {count}" for level, count in zip(levels, counts))
+    print(f"{len(result)} images ({summary})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
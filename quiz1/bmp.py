@@ -0,0 +1,106 @@
+"""Grayscale loading of the level images without going through a decoder.
+
+The level images are uncompressed 24-bit BMPs, so their pixels can be read
+straight from the file (or memory-mapped) into a NumPy array; only the
+grayscale conversion is left, and it gives the same result as
+cv2.imread + cvtColor(BGR2GRAY). Other files fall back to
+cv2.imread(IMREAD_GRAYSCALE).
+"""
+import struct
+from pathlib import Path
+import cv2
+import numpy as np
+
+_HEADER = 54
+# BITMAPINFOHEADER; older (BITMAPCOREHEADER, 12 bytes) headers lay out
+# width/height/bpp differently and have no compression field
+_MIN_DIB_HEADER = 40
+_BI_RGB = 0
+
+
+def bmp_layout(path):
+    """(offset, width, height, channels, row_bytes, bottom_up) of an
+    uncompressed 24/32-bit BMP, None for anything else"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER)
+    except OSError:
+        return None
+    if len(header) < _HEADER or header[:2] != b'BM':
+        return None
+    offset, dib_size = struct.unpack_from('<II', header, 10)
+    if dib_size < _MIN_DIB_HEADER:
+        return None
+    width, height, _, bpp, compression = struct.unpack_from('<iiHHI', header, 18)
+    if compression != _BI_RGB or bpp not in (24, 32) or width <= 0 or height == 0:
+        return None
+    # Rows are padded to a multiple of 4 bytes; positive heights are stored bottom-up
+    row_bytes = (width * bpp + 31) // 32 * 4
+    return offset, width, abs(height), bpp // 8, row_bytes, height > 0
+
+
+def _pixels(layout, rows):
+    """BGR(A) view of the raw `rows` buffer, top row first"""
+    _, width, height, channels, row_bytes, bottom_up = layout
+    pixels = rows.reshape(height, row_bytes)[:, :width * channels].reshape(height, width, channels)
+    return pixels[::-1] if bottom_up else pixels
+
+
+def memmap_bgr(path):
+    """Memory-mapped BGR(A) view of an uncompressed BMP's pixels, None if
+    the file is not one"""
+    layout = bmp_layout(path)
+    if layout is None:
+        return None
+    offset, _, height, _, row_bytes, _ = layout
+    try:
+        rows = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(height * row_bytes,))
+    except (OSError, ValueError):
+        return None
+    return _pixels(layout, rows)
+
+
+def read_gray(path, out=None):
+    """Grayscale image at `path`, None if it cannot be read.
+
+    Uncompressed BMPs are read directly. `out`, if given, receives the
+    result when it has the image's shape; otherwise a new array is returned.
+    """
+    layout = bmp_layout(path)
+    if layout is not None:
+        offset, _, height, channels, row_bytes, _ = layout
+        rows = np.fromfile(path, dtype=np.uint8, count=height * row_bytes, offset=offset)
+        if rows.size == height * row_bytes:
+            code = cv2.COLOR_BGR2GRAY if channels == 3 else cv2.COLOR_BGRA2GRAY
+            return cv2.cvtColor(_pixels(layout, rows), code, dst=out)
+    gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if gray is None or out is None or gray.shape != out.shape:
+        return gray
+    np.copyto(out, gray)
+    return out
+
+
+def read_directory(directory, pattern="*.bmp"):
+    """(names, images) of every file matching `pattern` in `directory`.
+
+    `images` is one (N, height, width) uint8 array, filled in place; all
+    images must have the size of the first one. Unreadable files are left
+    out.
+    """
+    paths = sorted(Path(directory).glob(pattern))
+    names = []
+    images = None
+    for path in paths:
+        slot = None if images is None else images[len(names)]
+        gray = read_gray(path, out=slot)
+        if gray is None:
+            continue
+        if images is None:
+            images = np.empty((len(paths),) + gray.shape, dtype=np.uint8)
+            images[0] = gray
+        elif gray.shape != images.shape[1:]:
+            raise ValueError(f"{path} is not {images.shape[2]}x{images.shape[1]}")
+        names.append(path.name)
+    if images is None:
+        return names, np.empty((0, 0, 0), dtype=np.uint8)
+    return names, images[:len(names)]
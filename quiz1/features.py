@@ -0,0 +1,253 @@
+"""Brightness / contrast / texture features of the level images, in parallel
+and cached on disk.
+
+The cache maps every image path to the (mtime, size) it had when its
+features were computed, so a recalibration only reads the images that are
+new or changed since the last run.
+
+Benchmark of the per-image features against the stacked kernel:
+
+    python features.py                  # the nivel_* folders
+    python features.py DIR [DIR ...] --repeat 5
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+from bmp import read_directory, read_gray
+
+# Bump when the features change, so old caches are not reused
+CACHE_VERSION = 1
+# Columns of the stack_features() matrix
+FEATURE_NAMES = ['brightness', 'contrast', 'texture']
+# Laplacian working set per chunk of stack_features(), sized to stay in cache
+CHUNK_BYTES = 1 << 20
+
+
+def simple_features(gray):
+    """The 3 key features of a grayscale image"""
+    return {
+        'brightness': float(np.mean(gray)),
+        'contrast': int(np.max(gray)) - int(np.min(gray)),
+        # Simple texture measure
+        'texture': float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+    }
+
+
+def stack_features(images, chunk_bytes=CHUNK_BYTES):
+    """simple_features() of every image of an (N, H, W) uint8 stack, as an
+    (N, 3) float64 matrix with FEATURE_NAMES columns.
+
+    Brightness and contrast are axis reductions over the whole stack. The
+    Laplacian is taken in CV_16S (exact for uint8 input) a few images at a
+    time, and its variance is computed from int64 sums, so the results are
+    the same as the per-image CV_64F path up to float rounding.
+    """
+    count, height, width = images.shape
+    pixels = height * width
+    flat = images.reshape(count, pixels)
+    features = np.empty((count, 3), dtype=np.float64)
+    features[:, 0] = flat.sum(axis=1, dtype=np.uint64) / pixels
+    features[:, 1] = flat.max(axis=1).astype(np.int16) - flat.min(axis=1)
+
+    chunk = max(1, chunk_bytes // (pixels * 2))
+    laplacian = np.empty((min(chunk, count), height, width), dtype=np.int16)
+    for start in range(0, count, chunk):
+        stop = min(count, start + chunk)
+        for i in range(start, stop):
+            cv2.Laplacian(images[i], cv2.CV_16S, dst=laplacian[i - start])
+        values = laplacian[:stop - start].reshape(stop - start, pixels)
+        total = values.sum(axis=1, dtype=np.int64)
+        wide = values.astype(np.int32)
+        squares = np.einsum('ij,ij->i', wide, wide, dtype=np.int64)
+        features[start:stop, 2] = (squares - total * total / pixels) / pixels
+    return features
+
+
+def _as_dict(row):
+    return {
+        'brightness': float(row[0]),
+        'contrast': int(row[1]),
+        'texture': float(row[2]),
+    }
+
+
+def image_features(image_path):
+    """Features of the image at `image_path`, None if it cannot be read"""
+    # Straight to grayscale: no BMP decode, no 3-channel intermediate
+    gray = read_gray(image_path)
+    if gray is None:
+        return None
+    return simple_features(gray)
+
+
+def grays_features(grays):
+    """simple_features() of a list of grayscale images (None entries give
+    None). Images of the same shape go through stack_features() together;
+    an image whose shape no other shares is computed on its own."""
+    results = [None] * len(grays)
+    shapes = {}
+    for i, gray in enumerate(grays):
+        if gray is not None:
+            shapes.setdefault(gray.shape, []).append(i)
+    for indices in shapes.values():
+        if len(indices) == 1:
+            results[indices[0]] = simple_features(grays[indices[0]])
+            continue
+        matrix = stack_features(np.stack([grays[i] for i in indices]))
+        for i, row in zip(indices, matrix):
+            results[i] = _as_dict(row)
+    return results
+
+
+def paths_features(paths):
+    """image_features() of several paths, through stack_features()"""
+    return grays_features([read_gray(path) for path in paths])
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class FeatureCache:
+    """JSON file of path -> {'stamp': [mtime_ns, size], 'features': {...}}"""
+    def __init__(self, cache_path):
+        self.cache_path = Path(cache_path)
+        self.entries = {}
+        self.dirty = False
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path) as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data['entries']
+            except (OSError, ValueError, KeyError):
+                # A damaged cache only costs a full re-scan
+                self.entries = {}
+
+    def get(self, path, stamp):
+        entry = self.entries.get(str(path))
+        if entry is not None and entry['stamp'] == stamp:
+            return entry['features']
+        return None
+
+    def put(self, path, stamp, features):
+        self.entries[str(path)] = {'stamp': stamp, 'features': features}
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries}, f)
+        # Replace in one step so an interrupted run never leaves half a file
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+def iter_features(paths, workers=None, cache=None, chunksize=64, batch_size=4096):
+    """Yield (path, features) for every path in `paths`, in order.
+
+    Images found in `cache` with the same mtime and size are not read
+    again; the rest are processed across `workers` processes (all cores by
+    default, 1 for no pool) and added to the cache, which is saved at the
+    end. `paths` is consumed `batch_size` at a time, so it can be a lazy
+    iterator over any number of images. Unreadable images give None.
+    """
+    workers = workers or os.cpu_count() or 1
+    paths = iter(paths)
+    pool = None
+    try:
+        while True:
+            batch = [str(path) for path in itertools.islice(paths, batch_size)]
+            if not batch:
+                break
+            results = [None] * len(batch)
+            pending = []
+            for i, path in enumerate(batch):
+                stamp = _stamp(path)
+                features = cache.get(path, stamp) if cache is not None else None
+                if features is None:
+                    pending.append((i, stamp))
+                else:
+                    results[i] = features
+
+            todo = [batch[i] for i, _ in pending]
+            # Workers get whole groups of images for the stacked kernel
+            size = max(1, min(chunksize, len(todo) // (4 * workers)))
+            groups = [todo[k:k + size] for k in range(0, len(todo), size)]
+            if workers == 1 or len(groups) < 2:
+                computed = map(paths_features, groups)
+            else:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                computed = pool.map(paths_features, groups)
+            computed = itertools.chain.from_iterable(computed)
+
+            for (i, stamp), features in zip(pending, computed):
+                results[i] = features
+                if cache is not None and features is not None:
+                    cache.put(batch[i], stamp, features)
+            yield from zip(batch, results)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            cache.save()
+
+
+def extract_features(paths, **options):
+    """Features of every path in `paths`, as a list in the same order
+    (see iter_features for the options)"""
+    return [features for _, features in iter_features(paths, **options)]
+
+
+def main(argv=None):
+    here = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directories", nargs="*", default=sorted(str(p) for p in here.glob("nivel_*")))
+    parser.add_argument("--repeat", type=int, default=20, help="timing runs per directory")
+    args = parser.parse_args(argv)
+
+    total_single = total_stacked = 0.0
+    images_count = 0
+    for directory in args.directories:
+        _, images = read_directory(directory)
+        if not len(images):
+            continue
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            single = np.array([[f[name] for name in FEATURE_NAMES] for f in map(simple_features, images)])
+        middle = time.perf_counter()
+        for _ in range(args.repeat):
+            stacked = stack_features(images)
+        end = time.perf_counter()
+
+        error = np.max(np.abs(stacked - single) / np.maximum(np.abs(single), 1.0), axis=0)
+        runs = args.repeat * len(images)
+        print(f"{Path(directory).name}: {len(images)} images, "
+              f"per-image {(middle - start) / runs * 1e6:.1f} us, stacked {(end - middle) / runs * 1e6:.1f} us, "
+              f"max relative error {error.max():.1e}")
+        total_single += middle - start
+        total_stacked += end - middle
+        images_count += runs
+
+    if not images_count:
+        print("[ERROR] No images found", file=sys.stderr)
+        return 1
+    print(f"Total: per-image {total_single / images_count * 1e6:.1f} us/image, "
+          f"stacked {total_stacked / images_count * 1e6:.1f} us/image "
+          f"({total_single / total_stacked:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,77 +1,61 @@
-import cv2
-import numpy as np
-import os
+import itertools
 from pathlib import Path
+from batch_classify import assign_levels, level_thresholds
+from features import FeatureCache, image_features, iter_features
+from running_stats import RunningStats
+
+FEATURES = ['brightness', 'contrast', 'texture']
+LEVEL_REASONS = {
+    'nivel_1': "Very dark image",
+    'nivel_2': "Dark image with some texture",
+    'nivel_3': "Medium brightness",
+    'nivel_4': "Bright image with high contrast",
+    'nivel_5': "Medium-bright image",
+}
 
 class SimpleImageClassifier:
-    def __init__(self, base_path):
+    def __init__(self, base_path, cache_path=None, workers=None):
+        """`cache_path` keeps the features between runs (feature_cache.json in
+        `base_path` by default); `workers` is the size of the process pool"""
         self.base_path = Path(base_path)
         self.levels = ['nivel_1', 'nivel_2', 'nivel_3', 'nivel_4', 'nivel_5']
+        self.cache_path = Path(cache_path) if cache_path else self.base_path / "feature_cache.json"
+        self.cache = FeatureCache(self.cache_path)
+        self.workers = workers
         
     def get_simple_features(self, image_path):
         """Extract only the most important features"""
-        img = cv2.imread(str(image_path))
-        if img is None:
-            return None
-            
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
         # Only 3 key features for simple classification
-        brightness = np.mean(gray)
-        contrast = np.max(gray) - np.min(gray)
-        
-        # Simple texture measure
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        texture = laplacian.var()
-        
-        return {
-            'brightness': brightness,
-            'contrast': contrast, 
-            'texture': texture
-        }
+        return image_features(image_path)
     
     def analyze_all_levels(self):
         """Analyze all images and create simple ranges"""
         print("🔍 ANALYZING IMAGES FOR SIMPLE RANGES")
         print("="*50)
         
-        ranges = {}
+        # One accumulator per level and feature: constant memory for any number of images
+        stats = {level: {name: RunningStats() for name in FEATURES} for level in self.levels}
+        
+        # Every level goes through one pool and one cache save; each image's
+        # level is the folder it comes from. Only new or changed images are
+        # read, the rest come from the cache
+        images = itertools.chain.from_iterable(
+            (self.base_path / level).glob("*.bmp") for level in self.levels
+        )
+        for path, features in iter_features(images, workers=self.workers, cache=self.cache):
+            if features:
+                level_stats = stats[Path(path).parent.name]
+                for name in FEATURES:
+                    level_stats[name].add(features[name])
         
+        ranges = {}
         for level in self.levels:
-            level_path = self.base_path / level
             print(f"\nAnalyzing {level}...")
-            
-            brightness_values = []
-            contrast_values = []
-            texture_values = []
-            
-            for img_file in level_path.glob("*.bmp"):
-                features = self.get_simple_features(img_file)
-                if features:
-                    brightness_values.append(features['brightness'])
-                    contrast_values.append(features['contrast'])
-                    texture_values.append(features['texture'])
-            
-            if brightness_values:
-                ranges[level] = {
-                    'brightness': {
-                        'min': min(brightness_values),
-                        'max': max(brightness_values),
-                        'avg': sum(brightness_values) / len(brightness_values)
-                    },
-                    'contrast': {
-                        'min': min(contrast_values),
-                        'max': max(contrast_values),
-                        'avg': sum(contrast_values) / len(contrast_values)
-                    },
-                    'texture': {
-                        'min': min(texture_values),
-                        'max': max(texture_values),
-                        'avg': sum(texture_values) / len(texture_values)
-                    },
-                    'count': len(brightness_values)
-                }
-                print(f"✅ Processed {len(brightness_values)} images")
+            count = stats[level]['brightness'].count
+            if count:
+                ranges[level] = {name: stats[level][name].summary() for name in FEATURES}
+                ranges[level]['count'] = count
+                print(f"✅ Processed {count} images")
             else:
                 print(f"❌ No images found")
         
@@ -86,9 +70,9 @@ class SimpleImageClassifier:
         for level, data in ranges.items():
             print(f"\n🎯 {level.upper()}:")
             print("-" * 30)
-            print(f"Brightness:  {data['brightness']['min']:6.1f} - {data['brightness']['max']:6.1f} (avg: {data['brightness']['avg']:6.1f})")
-            print(f"Contrast:    {data['contrast']['min']:6.1f} - {data['contrast']['max']:6.1f} (avg: {data['contrast']['avg']:6.1f})")
-            print(f"Texture:     {data['texture']['min']:6.1f} - {data['texture']['max']:6.1f} (avg: {data['texture']['avg']:6.1f})")
+            print(f"Brightness:  {data['brightness']['min']:6.1f} - {data['brightness']['max']:6.1f} (mean: {data['brightness']['mean']:6.1f}, std: {data['brightness']['std']:5.1f}, median: {data['brightness']['median']:6.1f})")
+            print(f"Contrast:    {data['contrast']['min']:6.1f} - {data['contrast']['max']:6.1f} (mean: {data['contrast']['mean']:6.1f}, std: {data['contrast']['std']:5.1f}, median: {data['contrast']['median']:6.1f})")
+            print(f"Texture:     {data['texture']['min']:6.1f} - {data['texture']['max']:6.1f} (mean: {data['texture']['mean']:6.1f}, std: {data['texture']['std']:5.1f}, median: {data['texture']['median']:6.1f})")
             print(f"Images:      {data['count']}")
     
     def classify_new_image(self, image_path, ranges):
@@ -106,17 +90,25 @@ class SimpleImageClassifier:
         print(f"Contrast:   {contrast:.1f}")
         print(f"Texture:    {texture:.1f}")
         
-        # Simple classification rules based on brightness primarily
-        if brightness < 14:
-            return "nivel_1", "Very dark image"
-        elif brightness < 19:
-            return "nivel_2", "Dark image with some texture"
-        elif brightness < 25:
-            return "nivel_3", "Medium brightness"
-        elif brightness < 45:
-            return "nivel_5", "Medium-bright image"
+        # Simple classification rules based on brightness primarily, with the
+        # cut points between the calibrated ranges
+        levels, thresholds = level_thresholds(ranges, 'brightness')
+        level = str(assign_levels(brightness, levels, thresholds))
+        return level, LEVEL_REASONS[level]
+
+def brightness_rules(ranges):
+    """The calibrated brightness ladder, one line per level"""
+    levels, thresholds = level_thresholds(ranges, 'brightness')
+    lines = []
+    for i, level in enumerate(levels):
+        if i == 0:
+            span = f"Below {thresholds[0]:.2f}"
+        elif i == len(levels) - 1:
+            span = f"Above {thresholds[-1]:.2f}"
         else:
-            return "nivel_4", "Bright image with high contrast"
+            span = f"{thresholds[i - 1]:.2f}-{thresholds[i]:.2f}"
+        lines.append(f"   • {span:<13} → {level.upper().replace('_', ' ')} ({LEVEL_REASONS[level]})")
+    return "\n".join(lines)
 
 def main():
     # Initialize the simple classifier
@@ -133,16 +125,10 @@ def main():
     print("\n" + "="*60)
     print("🎯 SIMPLE CLASSIFICATION RULES")
     print("="*60)
+    print("\nBased on the analysis, here are SIMPLE rules to classify new images:\n")
+    print("1. BRIGHTNESS (most important, the cut points classify_new_image uses):")
+    print(brightness_rules(ranges))
     print("""
-Based on the analysis, here are SIMPLE rules to classify new images:
-
-1. BRIGHTNESS (most important):
-   • Below 14     → NIVEL 1 (very dark)
-   • 14-19       → NIVEL 2 (dark) 
-   • 19-25       → NIVEL 3 (medium)
-   • 25-45       → NIVEL 5 (medium-bright)
-   • Above 45    → NIVEL 4 (bright)
-
 2. CONTRAST (secondary check):
    • Low (0-20)   → Probably Nivel 1-2
    • Medium (20-60) → Probably Nivel 3-5  
@@ -0,0 +1,140 @@
+"""Single-pass statistics for calibrating the level ranges.
+
+RunningStats keeps count, mean and variance (Welford), min and max, and a
+QuantileSketch for the median and other percentiles, all in constant
+memory. Two accumulators built on separate parts of the data merge into
+the same state as one accumulator fed everything, so partial results from
+parallel workers can be combined.
+"""
+import math
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch (logarithmic buckets, as in DDSketch).
+
+    A value x > 0 falls in bucket ceil(log_gamma(x)) with
+    gamma = (1 + a) / (1 - a); every quantile is then returned within
+    relative error `a` of an actual value of the data. Buckets only hold
+    counts, so merging sketches with the same accuracy is exact.
+    """
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        # Midpoint of bucket (gamma^(key-1), gamma^key] in relative terms
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value):
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif value < 0:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same accuracy can be merged")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), None if the sketch is empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Negative values in increasing order: largest magnitude first
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class RunningStats:
+    """Count, mean, variance, min, max and quantiles of a stream of values"""
+    def __init__(self, relative_accuracy=0.01):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        """Fold `other` into this accumulator (Chan et al. pairwise update)"""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance, like numpy.var"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        value = self.sketch.quantile(q)
+        # The exact extremes are known, never report past them
+        return None if value is None else min(max(value, self.min), self.max)
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def summary(self):
+        """The same keys level_ranges.json uses for each feature"""
+        return {
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'std': self.std,
+            'median': self.median,
+        }
@@ -1,5 +1,5 @@
-import cv2
-import numpy as np
+from bmp import read_gray
+from features import simple_features
 
 def classify_image_simple(image_path):
     """
@@ -7,24 +7,16 @@ def classify_image_simple(image_path):
     Returns: (level, confidence, features)
     """
     
-    # Load and process image
-    img = cv2.imread(image_path)
-    if img is None:
+    # Load the image directly as grayscale
+    gray = read_gray(image_path)
+    if gray is None:
         return None, 0, None
-        
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
     # Extract 3 key features
-    brightness = np.mean(gray)
-    contrast = np.max(gray) - np.min(gray)
-    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-    texture = laplacian.var()
-    
-    features = {
-        'brightness': brightness,
-        'contrast': contrast,
-        'texture': texture
-    }
+    features = simple_features(gray)
+    brightness = features['brightness']
+    contrast = features['contrast']
+    texture = features['texture']
     
     # SIMPLE CLASSIFICATION RULES
     # Based on brightness (most reliable feature)